@@ -19,39 +19,93 @@ int | str | str | str | datetime.date | datetime.time | int | float | bool | str
 int | str | str | str | datetime.date | datetime.time | int | float | bool | str | datetime
 ------------------------------------------------------------------------
 """
+from bisect import bisect_right
 from datetime import datetime
 from importlib.metadata import requires
-
-def muunna_varaustiedot(varaus: list) -> list:
-    """Muuntaa varauksen tiedot oikeisiin tietotyyppeihin."""
-    muutettuvaraus = []
-    muutettuvaraus.append(int(varaus[0]))
-    muutettuvaraus.append(str(varaus[1]))
-    muutettuvaraus.append(str(varaus[2]))
-    muutettuvaraus.append(str(varaus[3]))
-    muutettuvaraus.append(datetime.strptime(varaus[4], "%Y-%m-%d").date())
-    muutettuvaraus.append(datetime.strptime(varaus[5], "%H:%M").time())
-    muutettuvaraus.append(int(varaus[6]))
-    muutettuvaraus.append(float(varaus[7]))
-    muutettuvaraus.append(varaus[8] == "True")
-    muutettuvaraus.append(str(varaus[9]))
-    muutettuvaraus.append(datetime.strptime(varaus[10], "%Y-%m-%d %H:%M:%S"))
+from pathlib import Path
+import sys
+
+# Raportin luvut lasketaan samalla moottorilla kuin Viikko7:n raportissa. Hakemisto
+# lisätään hakupolun loppuun, jotta tämän viikon omat moduulit löytyvät ensin.
+sys.path.append(str(Path(__file__).resolve().parent.parent / "Viikko7"))
+from reservation_figures import analyze_columns
+
+MUUNNOKSET = [
+    int,
+    str,
+    str,
+    str,
+    lambda teksti: datetime.strptime(teksti, "%Y-%m-%d").date(),
+    lambda teksti: datetime.strptime(teksti, "%H:%M").time(),
+    int,
+    float,
+    lambda teksti: teksti == "True",
+    str,
+    lambda teksti: datetime.strptime(teksti, "%Y-%m-%d %H:%M:%S")
+]
+
+def muunna_varaustiedot(varaus: list, sarakkeet: list[int] | None = None) -> list:
+    """Muuntaa varauksen tiedot oikeisiin tietotyyppeihin.
+
+    Jos sarakkeet on annettu, muunnetaan vain niiden indeksien kentät ja muut
+    jätetään merkkijonoiksi.
+    """
+    if sarakkeet is None:
+        return [muunnos(kentta) for muunnos, kentta in zip(MUUNNOKSET, varaus, strict=True)]
+    muutettuvaraus = list(varaus)
+    for sarake in sarakkeet:
+        muutettuvaraus[sarake] = MUUNNOKSET[sarake](varaus[sarake])
     return muutettuvaraus
 
-def hae_varaukset(varaustiedosto: str) -> list:
-    """Hakee varaukset tiedostosta ja muuntaa ne oikeisiin tietotyyppeihin."""
+def hae_varaukset(varaustiedosto: str, sarakkeet: list[int] | None = None) -> list:
+    """Hakee varaukset tiedostosta ja muuntaa ne oikeisiin tietotyyppeihin.
+
+    Sarakkeet-parametrilla voi rajata muunnettavat kentät, ks. muunna_varaustiedot.
+    """
     varaukset = []
     varaukset.append(["varausId", "nimi", "sähköposti", "puhelin", "varauksenPvm", "varauksenKlo", "varauksenKesto", "hinta", "varausVahvistettu", "varattuTila", "varausLuotu"])
     with open(varaustiedosto, "r", encoding="utf-8") as f:
         for varaus in f:
             varaus = varaus.strip()
             varaustiedot = varaus.split('|')
-            varaukset.append(muunna_varaustiedot(varaustiedot))
+            varaukset.append(muunna_varaustiedot(varaustiedot, sarakkeet))
     return varaukset
 
+def rakenna_tilahakemisto(varaukset: list) -> dict:
+    """Ryhmittelee varaukset varatun tilan mukaan sanakirjaan."""
+    tilat = {}
+    for varaus in varaukset:
+        tilat.setdefault(varaus[9], []).append(varaus)
+    return tilat
+
+def rakenna_paivahakemisto(varaukset: list) -> tuple[list, list]:
+    """Järjestää varausten sijainnit päivämäärän mukaan.
+
+    Palauttaa päivämäärät ja varausten sijainnit listassa samassa järjestyksessä,
+    jolloin päivämäärähaut voidaan tehdä puolitushaulla ja tulokset palauttaa
+    tiedoston järjestykseen.
+    """
+    sijainnit = sorted(range(len(varaukset)), key=lambda sijainti: varaukset[sijainti][4])
+    return [varaukset[sijainti][4] for sijainti in sijainnit], sijainnit
+
+def analysoi_varaukset(varaukset: list) -> dict:
+    """Laskee raportin luvut Viikko7:n analyze_columns-moottorilla.
+
+    Palauttaa moottorin sanakirjan, jossa kalleimman vahvistetun varauksen kohdalla
+    on varauksen rivinumero (tasatilanteessa ensimmäinen) ja päiväkohtaiset määrät
+    on avattu päivämäärillä.
+    """
+    return analyze_columns(
+        [varaus[8] for varaus in varaukset],
+        [varaus[6] for varaus in varaukset],
+        [varaus[7] for varaus in varaukset],
+        [varaus[4] for varaus in varaukset]
+    )
+
 def main():
     
     varaukset = hae_varaukset("varaukset.txt")
+    analyysi = analysoi_varaukset(varaukset[1:])
 
     print("1) Vahvistetut varaukset")
     """Tulostaa vahvistetut varaukset."""
@@ -75,16 +129,14 @@ def main():
 
     print("\n4) Yhteenveto vahvistuksista")
     """Tulostaa yhteenvedon varausten vahvistusstatuksesta."""
-    for varaus in varaukset[1:]:
-        Vahvistettu = sum(1 for v in varaukset[1:] if v[8] == True)
-        Ei_vahvistettu = sum(1 for v in varaukset[1:] if v[8] == False)
+    Vahvistettu = analyysi["confirmed"]
+    Ei_vahvistettu = analyysi["unconfirmed"]
     print(f"- Vahvistettuja varauksia: {Vahvistettu} kpl")
     print(f"- Ei vahvistettuja varauksia: {Ei_vahvistettu} kpl")  
 
     print("\n5) Vahvistettujen varausten kokonaistulot")
     """Laskee vahvistettujen varausten kokonaistulot."""
-    for varaus in varaukset[1:]:
-        kokonaistulot = sum(v[7]*v[6] for v in varaukset[1:] if v[8] == True)
+    kokonaistulot = analyysi["confirmed_revenue"]
     print(f"Vahvistettujen varausten kokonaistulot: {kokonaistulot:.2f}".replace('.', ',') + " €")
 
     print("\nKallein varaus:")
@@ -93,19 +145,8 @@ def main():
             """Laskee varauksen kokonaishinnan."""
             kokonaishinta = varauksenKesto * hinta
             return kokonaishinta
-    
-    def kallein_varaus(varaukset):
-        kallein = None
-        korkein_hinta = 0
-        for varaus in varaukset:
-            if varaus[8] == True:
-                yhteishinta = kokonaishinta(varaus[6], varaus[7])
-                if yhteishinta > korkein_hinta:
-                    korkein_hinta = yhteishinta
-                    kallein = varaus
-        return kallein
-
-    kalleinvaraus = kallein_varaus(varaukset[1:])
+
+    kalleinvaraus = varaukset[1 + analyysi["most_expensive"]]
     print(f"- Nimi: {kalleinvaraus[1]}")
     print(f"- Varattu tila: {kalleinvaraus[9]}")
     print(f"- Päivä: {kalleinvaraus[4].strftime('%d.%m.%Y')}")
@@ -115,23 +156,16 @@ def main():
           
     print("\nVarausten määrä päivittäin:")
     """Laskee varausten määrän päivittäin."""
-    for varaus in varaukset[1:]:
-        """Laskee varausten määrän päivittäin."""
-        paivittain = {}
-        for varaus in varaukset[1:]:
-            pvm = varaus[4].strftime('%d.%m.%Y')
-            if pvm in paivittain:
-                paivittain[pvm] += 1
-            else:
-                paivittain[pvm] = 1
+    paivittain = analyysi["per_day"]
     for pvm, maara in paivittain.items():
-        print(f"- {pvm}: {maara} kpl")
+        print(f"- {pvm.strftime('%d.%m.%Y')}: {maara} kpl")
+
+    tilahakemisto = rakenna_tilahakemisto(varaukset[1:])
+    paivat, paivasijainnit = rakenna_paivahakemisto(varaukset[1:])
 
     def tilahaku(haetut_tilat):
         """Hakee varaukset käyttäjän syötteen perusteella"""
-        for varaus in varaukset[1:]:
-            if varaus[9] == haettu_tila:
-                haetut_varaukset.append(varaus)
+        haetut_varaukset.extend(tilahakemisto.get(haettu_tila, []))
         return(haetut_varaukset)
     haetut_varaukset = []
     haettu_tila = input("\nAnna tilan nimi: ")
@@ -145,9 +179,8 @@ def main():
 
     def hae_tulevat(tulevat):
         """Hakee tulevat varaukset käyttäjän antamasta päivämäärästä eteenpäin"""
-        for varaus in varaukset[1:]:
-            if varaus[4] > tulevienpvm:
-                tulevat_varaukset.append(varaus)
+        tulevat_sijainnit = sorted(paivasijainnit[bisect_right(paivat, tulevienpvm):])
+        tulevat_varaukset.extend(varaukset[1 + sijainti] for sijainti in tulevat_sijainnit)
         return tulevat_varaukset
     
     tulevat_varaukset = []
@@ -165,12 +198,7 @@ def main():
         for varaus in tulevat_varaukset:
             print(f"- {varaus[1]}, {varaus[4].strftime('%d.%m.%Y')} klo {varaus[5].strftime('%H.%M')}, {varaus[9]}")
 
-    vahvistetutVaraukset = []
-    for varaus in varaukset[1:]:
-        """Tarkistaa ja tallentaa vahvistetut varaukset erilliseen listaan."""
-        if varaus[8] == True:
-            vahvistetutVaraukset.append(varaus)
-    varaustenKeskimKesto = sum(v[6] for v in vahvistetutVaraukset) / len(vahvistetutVaraukset)
+    varaustenKeskimKesto = analyysi["average_confirmed_duration"]
     print(f"\nVahvistettujen varausten keskimääräinen kesto: {varaustenKeskimKesto:.2f}".replace('.', ',') + " h")
 
 
@@ -1,14 +1,23 @@
 # Copyright 2025 Niko Hätälä
 # License: MIT
 
-from datetime import date, datetime
+from array import array
+import argparse
+from datetime import date, datetime, timedelta
 from typing import List, Dict
+from meter_cache import load_cached_columns, save_cached_columns
+from phase_aggregation import aggregate_days, best_day, week_totals
+from timestamp_parser import HourlyTimestampParser
+
+EPOCH = datetime(1970, 1, 1)
+PHASE_COLUMNS = ["consumption_p1", "consumption_p2", "consumption_p3", "production_p1", "production_p2", "production_p3"]
     
 def edit_data_types(meter_data: list) -> list:
     """Edits the types of the meter data and changes power values from Wh to kWh."""
     meter_data_edited = []
+    timestamp_parser = HourlyTimestampParser()
     for meter_data in meter_data:
-        date_time = datetime.strptime((meter_data[0]), "%Y-%m-%dT%H:%M:%S")
+        date_time = timestamp_parser.parse_datetime(meter_data[0])
         phase1_consumption = float(meter_data[1]) / 1000
         phase2_consumption = float(meter_data[2]) / 1000
         phase3_consumption = float(meter_data[3]) / 1000
@@ -18,8 +27,28 @@ def edit_data_types(meter_data: list) -> list:
         meter_data_edited.append([date_time, phase1_consumption, phase2_consumption, phase3_consumption, production_phase1, production_phase2, production_phase3])
     return meter_data_edited
 
-def read_meter_data(meter_datafile: str) -> list:
-    """Reads meter data, changes types and returns a new list with edited types."""
+def columns_from_rows(meter_data: list) -> dict[str, array]:
+    """Converts meter data rows to columns for the cache."""
+    columns = {"timestamps": array("q", (int((line[0] - EPOCH).total_seconds()) for line in meter_data))}
+    for number, name in enumerate(PHASE_COLUMNS, start=1):
+        columns[name] = array("d", (line[number] for line in meter_data))
+    return columns
+
+def rows_from_columns(columns: dict) -> list:
+    """Converts cached columns back to meter data rows."""
+    timestamps = (EPOCH + timedelta(seconds=seconds) for seconds in columns["timestamps"])
+    return [list(row) for row in zip(timestamps, *(columns[name] for name in PHASE_COLUMNS))]
+
+def read_meter_data(meter_datafile: str, use_cache: bool = True, rebuild_cache: bool = False) -> list:
+    """Reads meter data, changes types and returns a new list with edited types.
+
+    The parsed columns are cached next to the data file and loaded from there
+    while the data file stays unchanged.
+    """
+    if use_cache and not rebuild_cache:
+        columns = load_cached_columns(meter_datafile)
+        if columns is not None:
+            return rows_from_columns(columns)
     meter_data = []
     with open(meter_datafile, "r", encoding="utf-8") as file:
         for line in file:
@@ -29,8 +58,17 @@ def read_meter_data(meter_datafile: str) -> list:
             else:
                 meter_data.append(line)
     meter_data = edit_data_types(meter_data)
+    if use_cache:
+        save_cached_columns(meter_datafile, columns_from_rows(meter_data))
     return meter_data
 
+def read_arguments() -> argparse.Namespace:
+    """Reads the command line arguments."""
+    parser = argparse.ArgumentParser(description="Sähkönkulutuksen ja -tuotannon käsittelyohjelma.")
+    parser.add_argument("--no-cache", action="store_true", help="Lue datatiedostot ilman välimuistia")
+    parser.add_argument("--rebuild-cache", action="store_true", help="Rakenna välimuisti uudelleen datatiedostoista")
+    return parser.parse_args()
+
 def finnish_day_name(english_day_name: str) -> str:
     """Converts English day names to Finnish."""
     days = {
@@ -44,30 +82,6 @@ def finnish_day_name(english_day_name: str) -> str:
     }
     return days.get(english_day_name, english_day_name)
 
-def consumption_per_hour(meter_data: list[float]) -> list[float]:
-    """Reads consumption for every phase per hour."""    
-    consumption_p1 = meter_data[1]
-    consumption_p2 = meter_data[2]
-    consumption_p3 = meter_data[3]
-    return [consumption_p1, consumption_p2, consumption_p3]
-
-def production_per_hour(meter_data: list[float]) -> list[float]:
-    """Reads production for every phase per hour."""
-    production_p1 = meter_data[4]
-    production_p2 = meter_data[5]
-    production_p3 = meter_data[6]
-    return [production_p1, production_p2, production_p3]
-
-def daily_net_consumption(meter_data: list[float]) -> float:
-    """Calculates the net consumption (consumption - production) for every phase per hour"""
-    consumption_all_phases = 0.0
-    production_all_phases = 0.0
-    net_consumption = 0.0
-    consumption_all_phases = meter_data[1] + meter_data[2] + meter_data[3]
-    production_all_phases = meter_data[4] + meter_data[5] + meter_data[6]
-    net_consumption = consumption_all_phases - production_all_phases
-    return net_consumption
-
 def main_menu():
     """Prints the main menu options."""
     print()
@@ -82,6 +96,7 @@ def main_menu():
 def main() -> None:
     """Main function to handle meter data."""
 
+    args = read_arguments()
     main_menu()    
     input_value = int(input("Valitse jokin yllä olevista vaihtoehdoista painamalla vastaavaa numeroa: "))
     print()
@@ -99,41 +114,13 @@ def main() -> None:
             print("\t\t(pp.kk.vvvv)\tv1\tv2\tv3\t\tv1\tv2\tv3")
             print("-----------------------------------------------------------------------------------")
             
-            meter_data = read_meter_data("viikko42.csv")
-            """Calculate total consumption and production per day and print the results."""
-            consumption_per_day = [0.0, 0.0, 0.0]
-            production_per_day = [0.0, 0.0, 0.0]
-            currentDate = meter_data[0][0].date()
-            lastline = meter_data[-1]
-            for line in meter_data:
-                """Iterate through meter data - calculate and print daily totals."""
-                finnish_day = finnish_day_name(currentDate.strftime("%A"))
-                date_str = currentDate.strftime("%d.%m.%Y")
-                if line is lastline:
-                    consumption_per_day[0] += consumption_per_hour(line)[0]
-                    consumption_per_day[1] += consumption_per_hour(line)[1]
-                    consumption_per_day[2] += consumption_per_hour(line)[2]
-                    production_per_day[0] += production_per_hour(line)[0]
-                    production_per_day[1] += production_per_hour(line)[1]
-                    production_per_day[2] += production_per_hour(line)[2]
-                    print(finnish_day + "\t" + date_str + "\t" + str(round(consumption_per_day[0], 2)).replace('.', ',') + "\t" + str(round(consumption_per_day[1], 2)).replace('.', ',') + "\t" + str(round(consumption_per_day[2], 2)).replace('.', ',') + "\t\t" + str(round(production_per_day[0], 2)).replace('.', ',') + "\t" + str(round(production_per_day[1], 2)).replace('.', ',') + "\t" + str(round(production_per_day[2], 2)).replace('.', ','))
-                elif line[0].date() == currentDate:
-                    consumption_per_day[0] += consumption_per_hour(line)[0]
-                    consumption_per_day[1] += consumption_per_hour(line)[1]
-                    consumption_per_day[2] += consumption_per_hour(line)[2]
-                    production_per_day[0] += production_per_hour(line)[0]
-                    production_per_day[1] += production_per_hour(line)[1]
-                    production_per_day[2] += production_per_hour(line)[2]
-                elif finnish_day == "Tiistai" or finnish_day == "Torstai":
-                    print(finnish_day + "\t\t" + date_str + "\t" + str(round(consumption_per_day[0], 2)).replace('.', ',') + "\t" + str(round(consumption_per_day[1], 2)).replace('.', ',') + "\t" + str(round(consumption_per_day[2], 2)).replace('.', ',') + "\t\t" + str(round(production_per_day[0], 2)).replace('.', ',') + "\t" + str(round(production_per_day[1], 2)).replace('.', ',') + "\t" + str(round(production_per_day[2], 2)).replace('.', ','))
-                    currentDate = line[0].date() 
-                    consumption_per_day = [0.0, 0.0, 0.0]
-                    production_per_day = [0.0, 0.0, 0.0]
-                else:
-                    print(finnish_day + "\t" + date_str + "\t" + str(round(consumption_per_day[0], 2)).replace('.', ',') + "\t" + str(round(consumption_per_day[1], 2)).replace('.', ',') + "\t" + str(round(consumption_per_day[2], 2)).replace('.', ',') + "\t\t" + str(round(production_per_day[0], 2)).replace('.', ',') + "\t" + str(round(production_per_day[1], 2)).replace('.', ',') + "\t" + str(round(production_per_day[2], 2)).replace('.', ','))
-                    currentDate = line[0].date() 
-                    consumption_per_day = [0.0, 0.0, 0.0]
-                    production_per_day = [0.0, 0.0, 0.0]
+            meter_data = read_meter_data("viikko42.csv", not args.no_cache, args.rebuild_cache)
+            """Print total consumption and production per day."""
+            for day in aggregate_days(meter_data):
+                finnish_day = finnish_day_name(day[0].strftime("%A"))
+                separator = "\t\t" if finnish_day == "Tiistai" or finnish_day == "Torstai" else "\t"
+                date_str = day[0].strftime("%d.%m.%Y")
+                print(finnish_day + separator + date_str + "\t" + str(round(day[1], 2)).replace('.', ',') + "\t" + str(round(day[2], 2)).replace('.', ',') + "\t" + str(round(day[3], 2)).replace('.', ',') + "\t\t" + str(round(day[4], 2)).replace('.', ',') + "\t" + str(round(day[5], 2)).replace('.', ',') + "\t" + str(round(day[6], 2)).replace('.', ','))
             if input_value == 1:
                 input_value = 0
                 main()    
@@ -142,50 +129,19 @@ def main() -> None:
             print()        
             print("Päivittäinen nettokulutus (kulutus - tuotanto, kWh)")
             print("-----------------------------------------------------------------------------------")
-            meter_data = read_meter_data("viikko42.csv")
-            net_consumption = 0.0
-            least_energy = daily_net_consumption(meter_data[0])
-            currentDate = meter_data[0][0].date()
-            lastline = meter_data[-1]
-            best_day = ""
-            for line in meter_data:
-                """Iterate through meter data - calculate net consumption, check best day and print net consumption."""
-                finnish_day = finnish_day_name(currentDate.strftime("%A"))
-                date_str = currentDate.strftime("%d.%m.%Y")
-                if line is lastline and net_consumption < least_energy:
-                    net_consumption += daily_net_consumption(line)
-                    print(finnish_day + "\t" + date_str + "\t" + str(round(net_consumption, 2)).replace('.', ','))
-                    least_energy = net_consumption
-                    best_day = finnish_day
-                elif line is lastline:
-                    net_consumption += daily_net_consumption(line)
-                    print(finnish_day + "\t" + date_str + "\t" + str(round(net_consumption, 2)).replace('.', ','))
-                elif line[0].date() == currentDate:
-                    net_consumption += daily_net_consumption(line)
-                elif finnish_day == "Tiistai" or finnish_day == "Torstai" and net_consumption < least_energy:
-                    print(finnish_day + "\t\t" + date_str + "\t" + str(round(net_consumption, 2)).replace('.', ','))
-                    least_energy = net_consumption
-                    best_day = finnish_day
-                    currentDate = line[0].date() 
-                    net_consumption = 0.0
-                elif finnish_day == "Tiistai" or finnish_day == "Torstai":
-                    print(finnish_day + "\t\t" + date_str + "\t" + str(round(net_consumption, 2)).replace('.', ','))
-                    currentDate = line[0].date() 
-                    net_consumption = 0.0
-                elif net_consumption < least_energy:
-                    print(finnish_day + "\t" + date_str + "\t" + str(round(net_consumption, 2)).replace('.', ','))
-                    least_energy = net_consumption
-                    best_day = finnish_day
-                    currentDate = line[0].date() 
-                    net_consumption = 0.0
-                else:
-                    print(finnish_day + "\t" + date_str + "\t" + str(round(net_consumption, 2)).replace('.', ','))
-                    currentDate = line[0].date() 
-                    net_consumption = 0.0
+            meter_data = read_meter_data("viikko42.csv", not args.no_cache, args.rebuild_cache)
+            days = aggregate_days(meter_data)
+            for day in days:
+                """Print net consumption per day."""
+                finnish_day = finnish_day_name(day[0].strftime("%A"))
+                separator = "\t\t" if finnish_day == "Tiistai" or finnish_day == "Torstai" else "\t"
+                date_str = day[0].strftime("%d.%m.%Y")
+                print(finnish_day + separator + date_str + "\t" + str(round(day[7], 2)).replace('.', ','))
+            best_day_name = finnish_day_name(best_day(days)[0].strftime("%A"))
 
             """Print the best day based on net consumption."""
             print()
-            print("- Viikon paras päivä nettokulutuksen perusteella: " + best_day + " -")
+            print("- Viikon paras päivä nettokulutuksen perusteella: " + best_day_name + " -")
             if input_value == 2:
                 input_value = 0
                 main()
@@ -194,17 +150,11 @@ def main() -> None:
             print()
             print("Yhteenveto viikon kulutuksesta ja tuotannosta vaiheittain")
             print("-----------------------------------------------------------------------------------")
-            meter_data = read_meter_data("viikko42.csv")
-            consumption_per_week = [0.0, 0.0, 0.0]
-            production_per_week = [0.0, 0.0, 0.0]
-            for line in meter_data:
-                """Calculate total consumption and production for every phase for the week."""
-                consumption_per_week[0] += consumption_per_hour(line)[0]
-                consumption_per_week[1] += consumption_per_hour(line)[1]
-                consumption_per_week[2] += consumption_per_hour(line)[2]
-                production_per_week[0] += production_per_hour(line)[0]
-                production_per_week[1] += production_per_hour(line)[1]
-                production_per_week[2] += production_per_hour(line)[2]
+            meter_data = read_meter_data("viikko42.csv", not args.no_cache, args.rebuild_cache)
+            """Calculate total consumption and production for every phase for the week."""
+            totals = week_totals(aggregate_days(meter_data))
+            consumption_per_week = totals[:3]
+            production_per_week = totals[3:]
             print("Vaihe\tKulutus [kWh]\tTuotanto [kWh]")
             print("1\t" + str(round(consumption_per_week[0], 2)).replace('.', ',') + "\t\t" + str(round(production_per_week[0], 2)).replace('.', ','))
             print("2\t" + str(round(consumption_per_week[1], 2)).replace('.', ',') + "\t\t" + str(round(production_per_week[1], 2)).replace('.', ','))
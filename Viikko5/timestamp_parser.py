@@ -0,0 +1,102 @@
+# Copyright 2025 Niko Hätälä
+# License: MIT
+
+from datetime import date, datetime, timedelta, timezone
+
+EPOCH_ORDINAL = date(1970, 1, 1).toordinal()
+ONE_HOUR = timedelta(hours=1)
+
+def decode_suffix(suffix: str) -> tuple[int, int | None]:
+    """Decodes the '.fff+HH:MM' part after the seconds.
+
+    Returns the microseconds and the UTC offset in seconds, or None as the offset
+    for a naive timestamp.
+    """
+    microsecond = 0
+    if suffix.startswith("."):
+        zone = suffix[1:].lstrip("0123456789")
+        fraction = suffix[1:len(suffix) - len(zone)]
+        microsecond = int(fraction.ljust(6, "0")[:6]) if fraction else 0
+        suffix = zone
+    if suffix == "":
+        return microsecond, None
+    if suffix == "Z":
+        return microsecond, 0
+    if len(suffix) != 6 or suffix[0] not in "+-" or suffix[3] != ":":
+        raise ValueError(f"Virheellinen aikavyöhyke: {suffix}")
+    offset = int(suffix[1:3]) * 3600 + int(suffix[4:6]) * 60
+    return microsecond, -offset if suffix[0] == "-" else offset
+
+def is_fixed_layout(text: str) -> bool:
+    """Checks if the timestamp starts with the YYYY-MM-DDTHH:MM:SS layout."""
+    return len(text) >= 19 and text[4] == "-" and text[7] == "-" and text[10] == "T" and text[13] == ":" and text[16] == ":"
+
+def decode_datetime(text: str) -> datetime:
+    """Decodes a YYYY-MM-DDTHH:MM:SS[.fff][+HH:MM] timestamp by position.
+
+    Other layouts, including other fraction and offset forms such as +0200,
+    fall back to datetime.fromisoformat.
+    """
+    if not is_fixed_layout(text):
+        return datetime.fromisoformat(text)
+    try:
+        microsecond, offset = decode_suffix(text[19:])
+    except ValueError:
+        return datetime.fromisoformat(text)
+    tzinfo = None if offset is None else timezone(timedelta(seconds=offset))
+    return datetime(int(text[0:4]), int(text[5:7]), int(text[8:10]), int(text[11:13]), int(text[14:16]), int(text[17:19]), microsecond, tzinfo)
+
+def decode_epoch(text: str) -> tuple[int, int]:
+    """Decodes a timestamp to (epoch seconds, UTC offset in seconds).
+
+    Naive timestamps are treated as UTC wall clock time with a zero offset.
+    """
+    date_time = decode_datetime(text)
+    offset = int(date_time.utcoffset().total_seconds()) if date_time.tzinfo else 0
+    days = date_time.toordinal() - EPOCH_ORDINAL
+    seconds = days * 86400 + date_time.hour * 3600 + date_time.minute * 60 + date_time.second
+    return seconds - offset, offset
+
+class HourlyTimestampParser:
+    """Parses the timestamps of an hourly meter export row by row.
+
+    Consecutive rows are normally exactly one hour apart. When a timestamp only
+    differs from the previous one by the next hour (up to 23) of the same day and
+    the same offset, the previous result is stepped forward an hour instead of parsing the
+    text again. Any other timestamp is decoded in full.
+    """
+    def __init__(self):
+        self.previous_text = ""
+        self.previous_hour = -1
+        self.previous_epoch = None
+        self.previous_datetime = None
+
+    def _is_next_hour(self, text: str) -> bool:
+        """Checks if the timestamp is the hour after the previous one."""
+        previous_text = self.previous_text
+        if self.previous_hour < 0 or text[:11] != previous_text[:11] or text[13:] != previous_text[13:]:
+            return False
+        hour = int(text[11:13])
+        return hour == self.previous_hour + 1 and hour <= 23
+
+    def parse_epoch(self, text: str) -> tuple[int, int]:
+        """Returns (epoch seconds, UTC offset in seconds) of a timestamp."""
+        if self.previous_epoch is not None and self._is_next_hour(text):
+            self.previous_epoch = (self.previous_epoch[0] + 3600, self.previous_epoch[1])
+            self.previous_hour += 1
+        else:
+            self.previous_epoch = decode_epoch(text)
+            self.previous_hour = int(text[11:13]) if is_fixed_layout(text) else -2
+        self.previous_text = text
+        return self.previous_epoch
+
+    def parse_datetime(self, text: str) -> datetime:
+        """Returns the timestamp as a datetime."""
+        if self.previous_datetime is not None and self._is_next_hour(text):
+            self.previous_datetime = self.previous_datetime + ONE_HOUR
+            self.previous_hour += 1
+        else:
+            self.previous_datetime = decode_datetime(text)
+            self.previous_hour = int(text[11:13]) if is_fixed_layout(text) else -2
+        self.previous_text = text
+        return self.previous_datetime
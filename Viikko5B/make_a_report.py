@@ -1,16 +1,30 @@
 # Copyright 2025 Niko Hätälä
 # License: MIT
 
-from datetime import date, datetime
+from array import array
+import argparse
+from concurrent.futures import ProcessPoolExecutor
+from datetime import date, datetime, timedelta
+from itertools import repeat
 import sys
 from typing import List, Dict
 from pathlib import Path
+from meter_cache import file_hash, load_cached_columns, save_cached_columns
+from phase_aggregation import aggregate_days
+from report_manifest import find_section, read_manifest, remove_manifest, splice_sections, write_manifest
+from report_renderer import WeeklyReportRenderer
+from timestamp_parser import HourlyTimestampParser
+
+EPOCH = datetime(1970, 1, 1)
+WEEKLY_REPORT = WeeklyReportRenderer()
+PHASE_COLUMNS = ["consumption_p1", "consumption_p2", "consumption_p3", "production_p1", "production_p2", "production_p3"]
 
 def edit_data_types(meter_data: list) -> list:
     """Edits the types of the meter data and changes power values from Wh to kWh."""
     meter_data_edited = []
+    timestamp_parser = HourlyTimestampParser()
     for meter_data in meter_data:
-        date_time = datetime.strptime((meter_data[0]), "%Y-%m-%dT%H:%M:%S")
+        date_time = timestamp_parser.parse_datetime(meter_data[0])
         phase1_consumption = float(meter_data[1]) / 1000
         phase2_consumption = float(meter_data[2]) / 1000
         phase3_consumption = float(meter_data[3]) / 1000
@@ -20,8 +34,28 @@ def edit_data_types(meter_data: list) -> list:
         meter_data_edited.append([date_time, phase1_consumption, phase2_consumption, phase3_consumption, production_phase1, production_phase2, production_phase3])
     return meter_data_edited
 
-def read_meter_data(meter_datafile: str) -> list:
-    """Reads meter data, changes types and returns a new list with edited types."""
+def columns_from_rows(meter_data: list) -> dict[str, array]:
+    """Converts meter data rows to columns for the cache."""
+    columns = {"timestamps": array("q", (int((line[0] - EPOCH).total_seconds()) for line in meter_data))}
+    for number, name in enumerate(PHASE_COLUMNS, start=1):
+        columns[name] = array("d", (line[number] for line in meter_data))
+    return columns
+
+def rows_from_columns(columns: dict) -> list:
+    """Converts cached columns back to meter data rows."""
+    timestamps = (EPOCH + timedelta(seconds=seconds) for seconds in columns["timestamps"])
+    return [list(row) for row in zip(timestamps, *(columns[name] for name in PHASE_COLUMNS))]
+
+def read_meter_data(meter_datafile: str, use_cache: bool = True, rebuild_cache: bool = False) -> list:
+    """Reads meter data, changes types and returns a new list with edited types.
+
+    The parsed columns are cached next to the data file and loaded from there
+    while the data file stays unchanged.
+    """
+    if use_cache and not rebuild_cache:
+        columns = load_cached_columns(meter_datafile)
+        if columns is not None:
+            return rows_from_columns(columns)
     meter_data = []
     with open(meter_datafile, "r", encoding="utf-8") as file:
         for line in file:
@@ -31,8 +65,23 @@ def read_meter_data(meter_datafile: str) -> list:
             else:
                 meter_data.append(line)
     meter_data = edit_data_types(meter_data)
+    if use_cache:
+        save_cached_columns(meter_datafile, columns_from_rows(meter_data))
     return meter_data
 
+def read_arguments() -> argparse.Namespace:
+    """Reads the command line arguments."""
+    parser = argparse.ArgumentParser(description="Viikkoraporttien luontiohjelma.")
+    parser.add_argument("--no-cache", action="store_true", help="Lue datatiedostot ilman välimuistia")
+    parser.add_argument("--rebuild-cache", action="store_true", help="Rakenna välimuisti uudelleen datatiedostoista")
+    parser.add_argument("--update", action="store_true", help="Päivitä raportti kaikkien viikkojen tiedoista ilman valikkoa ja lopeta")
+    parser.add_argument("--report", default="yhteenveto.txt", help="Päivitettävä raporttitiedosto --update-valinnalla (oletus: yhteenveto.txt)")
+    parser.add_argument("--workers", type=int, default=None, help="Rinnakkaisten prosessien määrä koko raportin luonnissa (oletus: prosessoriytimien määrä)")
+    args = parser.parse_args()
+    if args.workers is not None and args.workers < 1:
+        parser.error("--workers: prosessien määrän on oltava vähintään 1")
+    return args
+
 def finnish_day_name(english_day_name: str) -> str:
     """Converts English day names to Finnish."""
     days = {
@@ -50,20 +99,6 @@ def finnish_date(date_obj: date) -> str:
     """Formats date object to Finnish date format dd.mm.yyyy."""
     return date_obj.strftime("%d.%m.%Y")
 
-def consumption_per_hour(meter_data: list[float]) -> list[float]:
-    """Reads consumption for every phase per hour."""    
-    consumption_p1 = meter_data[1]
-    consumption_p2 = meter_data[2]
-    consumption_p3 = meter_data[3]
-    return [consumption_p1, consumption_p2, consumption_p3]
-
-def production_per_hour(meter_data: list[float]) -> list[float]:
-    """Reads production for every phase per hour."""
-    production_p1 = meter_data[4]
-    production_p2 = meter_data[5]
-    production_p3 = meter_data[6]
-    return [production_p1, production_p2, production_p3]
-
 def main_menu():
     """Prints the main menu options."""
     print()
@@ -72,7 +107,7 @@ def main_menu():
     print("------------------------------")
     print("1 - Lisää halutun viikon tiedot nykyiseen tiedostoon")
     print("2 - Tyhjennä ja lisää halutun viikon tiedot uuteen tiedostoon")
-    print("3 - Luo uusi raportti kaikkien viikkojen tiedoista")
+    print("3 - Päivitä raportti kaikkien viikkojen tiedoista (vain uudet ja muuttuneet viikot)")
     print("4 - Näytä nykyisen raporttitiedoston tiedot")
     print("5 - Poista raporttitiedosto")
     print("9 - Lopeta ohjelma")
@@ -86,6 +121,7 @@ def erase_report(report_file: str) -> None:
         with open(Path(report_file), "w", encoding="utf-8") as file:
             file.write("")
             print("\n**Raporttitiedosto tyhjennetty.**\n")
+        remove_manifest(report_file)
     else:
         print("\n**Raporttitiedostoa ei löydy.**\n")
 
@@ -93,6 +129,7 @@ def delete_report(report_file: str) -> None:
     """Deletes the report file if it exists."""
     if Path(report_file).is_file():
         Path(report_file).unlink()
+        remove_manifest(report_file)
         print("\n**Raporttitiedosto poistettu.**\n")
     else:
         print("\n**Raporttitiedostoa ei löydy.**\n")
@@ -104,197 +141,111 @@ def confirmation_prompt(raportti: str) -> bool:
         return False
     return True
 
-def write_new_report(weekly_data: str, report_file: str) -> None:
-    """Adds weekly data to a clean report file."""
-    weekly_data = read_meter_data(weekly_data)
+def render_week_section(weekly_data: list) -> str:
+    """Renders the report section of one week's meter data."""
     week_num = weekly_data[0][0].isocalendar()[1]
-    try:
-        with open(Path(report_file), "x", encoding="utf-8") as file:
-            file.write("\n\n\nRaportin luonti-/muokkauspäivä: " + finnish_date(date.today()) + "\n")
-            file.write("\n")
-            file.write("Viikon " + str(week_num) + " sähkönkulutus ja -tuotanto (kWh, vaiheittain)\n")
-            file.write("Päivä\t\tPvm\t\t\t\tKulutus [kWh]\t\t\t\tTuotanto [kWh]")
-            file.write("\n")
-            file.write("\t\t\t(pp.kk.vvvv)\tv1\t\tv2\t\tv3\t\t\tv1\t\tv2\t\tv3")
-            file.write("\n")
-            file.write("-----------------------------------------------------------------------------------")
-            file.write("\n")        
-            consumption_per_day = [0.0, 0.0, 0.0]
-            production_per_day = [0.0, 0.0, 0.0]
-            currentDate = weekly_data[0][0].date()
-            lastline = weekly_data[-1]
-            for line in weekly_data:
-                """Iterate through meter data - calculate and write daily totals on report."""
-                finnish_day = finnish_day_name(currentDate.strftime("%A"))
-                date_str = currentDate.strftime("%d.%m.%Y")
-                if line is lastline:
-                    consumption_per_day[0] += consumption_per_hour(line)[0]
-                    consumption_per_day[1] += consumption_per_hour(line)[1]
-                    consumption_per_day[2] += consumption_per_hour(line)[2]
-                    production_per_day[0] += production_per_hour(line)[0]
-                    production_per_day[1] += production_per_hour(line)[1]
-                    production_per_day[2] += production_per_hour(line)[2]
-                    file.write(finnish_day + "\t" + date_str + "\t\t" + "{:.2f}".format(consumption_per_day[0]).replace('.', ',') + "\t" + "{:.2f}".format(consumption_per_day[1]).replace('.', ',') + "\t" + "{:.2f}".format(consumption_per_day[2]).replace('.', ',') + "\t\t" + "{:.2f}".format(production_per_day[0]).replace('.', ',') + "\t" + "{:.2f}".format(production_per_day[1]).replace('.', ',') + "\t" + "{:.2f}".format(production_per_day[2]).replace('.', ',') + "\n")
-                elif line[0].date() == currentDate:
-                    consumption_per_day[0] += consumption_per_hour(line)[0]
-                    consumption_per_day[1] += consumption_per_hour(line)[1]
-                    consumption_per_day[2] += consumption_per_hour(line)[2]
-                    production_per_day[0] += production_per_hour(line)[0]
-                    production_per_day[1] += production_per_hour(line)[1]
-                    production_per_day[2] += production_per_hour(line)[2]
-                elif finnish_day == "Tiistai" or finnish_day == "Torstai":
-                    file.write(finnish_day + "\t\t" + date_str + "\t\t" + "{:.2f}".format(consumption_per_day[0]).replace('.', ',') + "\t" + "{:.2f}".format(consumption_per_day[1]).replace('.', ',') + "\t" + "{:.2f}".format(consumption_per_day[2]).replace('.', ',') + "\t\t" + "{:.2f}".format(production_per_day[0]).replace('.', ',') + "\t" + "{:.2f}".format(production_per_day[1]).replace('.', ',') + "\t" + "{:.2f}".format(production_per_day[2]).replace('.', ',') + "\n")
-                    currentDate = line[0].date() 
-                    consumption_per_day = [0.0, 0.0, 0.0]
-                    production_per_day = [0.0, 0.0, 0.0]
-                else:
-                    file.write(finnish_day + "\t" + date_str + "\t\t" + "{:.2f}".format(consumption_per_day[0]).replace('.', ',') + "\t" + "{:.2f}".format(consumption_per_day[1]).replace('.', ',') + "\t" + "{:.2f}".format(consumption_per_day[2]).replace('.', ',') + "\t\t" + "{:.2f}".format(production_per_day[0]).replace('.', ',') + "\t" + "{:.2f}".format(production_per_day[1]).replace('.', ',') + "\t" + "{:.2f}".format(production_per_day[2]).replace('.', ',') + "\n")
-                    currentDate = line[0].date() 
-                    consumption_per_day = [0.0, 0.0, 0.0]
-                    production_per_day = [0.0, 0.0, 0.0]
-    except FileExistsError:
+    return WEEKLY_REPORT.render_section(week_num, aggregate_days(weekly_data), date.today())
+
+def build_week_section(weekly_file: str, use_cache: bool = True, rebuild_cache: bool = False) -> tuple[int, str]:
+    """Reads a weekly data file and renders its report section. Runs in a worker process."""
+    weekly_data = read_meter_data(weekly_file, use_cache, rebuild_cache)
+    return weekly_data[0][0].isocalendar()[1], render_week_section(weekly_data)
+
+def find_weekly_files() -> list[str]:
+    """Returns the weekly data files viikko01.csv - viikko52.csv that exist."""
+    weekly_files = []
+    for week in range(1, 53):
+        week_str = str(week).zfill(2)
+        weekly_file = "viikko" + week_str + ".csv"
+        if Path(weekly_file).is_file():
+            weekly_files.append(weekly_file)
+    return weekly_files
+
+def write_new_report(weekly_data: str, report_file: str, use_cache: bool = True, rebuild_cache: bool = False) -> None:
+    """Adds weekly data to a clean report file."""
+    week_num, section = build_week_section(weekly_data, use_cache, rebuild_cache)
+    if Path(report_file).is_file():
         print("\n**Raporttitiedosto on jo olemassa, tyhjennetään ja lisätään viikon " + str(week_num) + " tiedot.**")
-        with open(Path(report_file), "w", encoding="utf-8") as file:
-            file.write("\n\n\nRaportin luonti-/muokkauspäivä: " + finnish_date(date.today()) + "\n")
-            file.write("\n")
-            file.write("Viikon " + str(week_num) + " sähkönkulutus ja -tuotanto (kWh, vaiheittain)\n")
-            file.write("Päivä\t\tPvm\t\t\t\tKulutus [kWh]\t\t\t\tTuotanto [kWh]")
-            file.write("\n")
-            file.write("\t\t\t(pp.kk.vvvv)\tv1\t\tv2\t\tv3\t\t\tv1\t\tv2\t\tv3")
-            file.write("\n")
-            file.write("-----------------------------------------------------------------------------------")
-            file.write("\n")        
-            consumption_per_day = [0.0, 0.0, 0.0]
-            production_per_day = [0.0, 0.0, 0.0]
-            currentDate = weekly_data[0][0].date()
-            lastline = weekly_data[-1]
-            for line in weekly_data:
-                """Iterate through meter data - calculate and write daily totals on report."""
-                finnish_day = finnish_day_name(currentDate.strftime("%A"))
-                date_str = currentDate.strftime("%d.%m.%Y")
-                if line is lastline:
-                    consumption_per_day[0] += consumption_per_hour(line)[0]
-                    consumption_per_day[1] += consumption_per_hour(line)[1]
-                    consumption_per_day[2] += consumption_per_hour(line)[2]
-                    production_per_day[0] += production_per_hour(line)[0]
-                    production_per_day[1] += production_per_hour(line)[1]
-                    production_per_day[2] += production_per_hour(line)[2]
-                    file.write(finnish_day + "\t" + date_str + "\t\t" + "{:.2f}".format(consumption_per_day[0]).replace('.', ',') + "\t" + "{:.2f}".format(consumption_per_day[1]).replace('.', ',') + "\t" + "{:.2f}".format(consumption_per_day[2]).replace('.', ',') + "\t\t" + "{:.2f}".format(production_per_day[0]).replace('.', ',') + "\t" + "{:.2f}".format(production_per_day[1]).replace('.', ',') + "\t" + "{:.2f}".format(production_per_day[2]).replace('.', ',') + "\n")
-                elif line[0].date() == currentDate:
-                    consumption_per_day[0] += consumption_per_hour(line)[0]
-                    consumption_per_day[1] += consumption_per_hour(line)[1]
-                    consumption_per_day[2] += consumption_per_hour(line)[2]
-                    production_per_day[0] += production_per_hour(line)[0]
-                    production_per_day[1] += production_per_hour(line)[1]
-                    production_per_day[2] += production_per_hour(line)[2]
-                elif finnish_day == "Tiistai" or finnish_day == "Torstai":
-                    file.write(finnish_day + "\t\t" + date_str + "\t\t" + "{:.2f}".format(consumption_per_day[0]).replace('.', ',') + "\t" + "{:.2f}".format(consumption_per_day[1]).replace('.', ',') + "\t" + "{:.2f}".format(consumption_per_day[2]).replace('.', ',') + "\t\t" + "{:.2f}".format(production_per_day[0]).replace('.', ',') + "\t" + "{:.2f}".format(production_per_day[1]).replace('.', ',') + "\t" + "{:.2f}".format(production_per_day[2]).replace('.', ',') + "\n")
-                    currentDate = line[0].date() 
-                    consumption_per_day = [0.0, 0.0, 0.0]
-                    production_per_day = [0.0, 0.0, 0.0]
-                else:
-                    file.write(finnish_day + "\t" + date_str + "\t\t" + "{:.2f}".format(consumption_per_day[0]).replace('.', ',') + "\t" + "{:.2f}".format(consumption_per_day[1]).replace('.', ',') + "\t" + "{:.2f}".format(consumption_per_day[2]).replace('.', ',') + "\t\t" + "{:.2f}".format(production_per_day[0]).replace('.', ',') + "\t" + "{:.2f}".format(production_per_day[1]).replace('.', ',') + "\t" + "{:.2f}".format(production_per_day[2]).replace('.', ',') + "\n")
-                    currentDate = line[0].date() 
-                    consumption_per_day = [0.0, 0.0, 0.0]
-                    production_per_day = [0.0, 0.0, 0.0]
+    with open(Path(report_file), "w", encoding="utf-8") as file:
+        file.write("")
+    rendered = {weekly_data: (week_num, file_hash(weekly_data).hex(), section)}
+    write_manifest(report_file, splice_sections(report_file, [], rendered))
 
-def add_to_report(weekly_data: str, report_file: str) -> None:
-    """Adds weekly data to a existing report file."""
-    weekly_data = read_meter_data(weekly_data)
-    week_num = weekly_data[0][0].isocalendar()[1]
-    try:
-        with open(Path(report_file), "x", encoding="utf-8") as file:
-            file.write("\n\n\nRaportin luonti-/muokkauspäivä: " + finnish_date(date.today()) + "\n")
-            file.write("\n")
-            file.write("Viikon " + str(week_num) + " sähkönkulutus ja -tuotanto (kWh, vaiheittain)\n")
-            file.write("Päivä\t\tPvm\t\t\t\tKulutus [kWh]\t\t\t\tTuotanto [kWh]")
-            file.write("\n")
-            file.write("\t\t\t(pp.kk.vvvv)\tv1\t\tv2\t\tv3\t\t\tv1\t\tv2\t\tv3")
-            file.write("\n")
-            file.write("-----------------------------------------------------------------------------------")
-            file.write("\n")        
-            consumption_per_day = [0.0, 0.0, 0.0]
-            production_per_day = [0.0, 0.0, 0.0]
-            currentDate = weekly_data[0][0].date()
-            lastline = weekly_data[-1]
-            for line in weekly_data:
-                """Iterate through meter data - calculate and write daily totals on report."""
-                finnish_day = finnish_day_name(currentDate.strftime("%A"))
-                date_str = currentDate.strftime("%d.%m.%Y")
-                if line is lastline:
-                    consumption_per_day[0] += consumption_per_hour(line)[0]
-                    consumption_per_day[1] += consumption_per_hour(line)[1]
-                    consumption_per_day[2] += consumption_per_hour(line)[2]
-                    production_per_day[0] += production_per_hour(line)[0]
-                    production_per_day[1] += production_per_hour(line)[1]
-                    production_per_day[2] += production_per_hour(line)[2]
-                    file.write(finnish_day + "\t" + date_str + "\t\t" + "{:.2f}".format(consumption_per_day[0]).replace('.', ',') + "\t" + "{:.2f}".format(consumption_per_day[1]).replace('.', ',') + "\t" + "{:.2f}".format(consumption_per_day[2]).replace('.', ',') + "\t\t" + "{:.2f}".format(production_per_day[0]).replace('.', ',') + "\t" + "{:.2f}".format(production_per_day[1]).replace('.', ',') + "\t" + "{:.2f}".format(production_per_day[2]).replace('.', ',') + "\n")
-                elif line[0].date() == currentDate:
-                    consumption_per_day[0] += consumption_per_hour(line)[0]
-                    consumption_per_day[1] += consumption_per_hour(line)[1]
-                    consumption_per_day[2] += consumption_per_hour(line)[2]
-                    production_per_day[0] += production_per_hour(line)[0]
-                    production_per_day[1] += production_per_hour(line)[1]
-                    production_per_day[2] += production_per_hour(line)[2]
-                elif finnish_day == "Tiistai" or finnish_day == "Torstai":
-                    file.write(finnish_day + "\t\t" + date_str + "\t\t" + "{:.2f}".format(consumption_per_day[0]).replace('.', ',') + "\t" + "{:.2f}".format(consumption_per_day[1]).replace('.', ',') + "\t" + "{:.2f}".format(consumption_per_day[2]).replace('.', ',') + "\t\t" + "{:.2f}".format(production_per_day[0]).replace('.', ',') + "\t" + "{:.2f}".format(production_per_day[1]).replace('.', ',') + "\t" + "{:.2f}".format(production_per_day[2]).replace('.', ',') + "\n")
-                    currentDate = line[0].date() 
-                    consumption_per_day = [0.0, 0.0, 0.0]
-                    production_per_day = [0.0, 0.0, 0.0]
-                else:
-                    file.write(finnish_day + "\t" + date_str + "\t\t" + "{:.2f}".format(consumption_per_day[0]).replace('.', ',') + "\t" + "{:.2f}".format(consumption_per_day[1]).replace('.', ',') + "\t" + "{:.2f}".format(consumption_per_day[2]).replace('.', ',') + "\t\t" + "{:.2f}".format(production_per_day[0]).replace('.', ',') + "\t" + "{:.2f}".format(production_per_day[1]).replace('.', ',') + "\t" + "{:.2f}".format(production_per_day[2]).replace('.', ',') + "\n")
-                    currentDate = line[0].date() 
-                    consumption_per_day = [0.0, 0.0, 0.0]
-                    production_per_day = [0.0, 0.0, 0.0]
-    except FileExistsError:
+def add_to_report(weekly_data: str, report_file: str, use_cache: bool = True, rebuild_cache: bool = False) -> bool:
+    """Adds weekly data to a existing report file.
+
+    A week that is already in the report is skipped if its data file has not
+    changed and replaced in place if it has. Returns False if the week was skipped.
+    """
+    sections = read_manifest(report_file) or []
+    source_hash = file_hash(weekly_data).hex()
+    entry = find_section(sections, weekly_data)
+    if entry is not None and entry["hash"] == source_hash:
+        print("\n**Viikon " + str(entry["week"]) + " tiedot ovat jo raportissa eikä datatiedosto ole muuttunut.**")
+        return False
+    week_num, section = build_week_section(weekly_data, use_cache, rebuild_cache)
+    if entry is not None:
+        print("\n**Viikon " + str(week_num) + " datatiedosto on muuttunut, korvataan viikon tiedot raportissa.**")
+    elif Path(report_file).is_file():
         print("\n**Raporttitiedosto on jo olemassa, lisätään viikon " + str(week_num) + " tiedot.**")
-        with open(Path(report_file), "a", encoding="utf-8") as file:
-            file.write("\n\n\nRaportin luonti-/muokkauspäivä: " + finnish_date(date.today()) + "\n")
-            file.write("\n")
-            file.write("Viikon " + str(week_num) + " sähkönkulutus ja -tuotanto (kWh, vaiheittain)\n")
-            file.write("Päivä\t\tPvm\t\t\t\tKulutus [kWh]\t\t\t\tTuotanto [kWh]")
-            file.write("\n")
-            file.write("\t\t\t(pp.kk.vvvv)\tv1\t\tv2\t\tv3\t\t\tv1\t\tv2\t\tv3")
-            file.write("\n")
-            file.write("-----------------------------------------------------------------------------------")
-            file.write("\n")        
-            consumption_per_day = [0.0, 0.0, 0.0]
-            production_per_day = [0.0, 0.0, 0.0]
-            currentDate = weekly_data[0][0].date()
-            lastline = weekly_data[-1]
-            for line in weekly_data:
-                """Iterate through meter data - calculate and write daily totals on report."""
-                finnish_day = finnish_day_name(currentDate.strftime("%A"))
-                date_str = currentDate.strftime("%d.%m.%Y")
-                if line is lastline:
-                    consumption_per_day[0] += consumption_per_hour(line)[0]
-                    consumption_per_day[1] += consumption_per_hour(line)[1]
-                    consumption_per_day[2] += consumption_per_hour(line)[2]
-                    production_per_day[0] += production_per_hour(line)[0]
-                    production_per_day[1] += production_per_hour(line)[1]
-                    production_per_day[2] += production_per_hour(line)[2]
-                    file.write(finnish_day + "\t" + date_str + "\t\t" + "{:.2f}".format(consumption_per_day[0]).replace('.', ',') + "\t" + "{:.2f}".format(consumption_per_day[1]).replace('.', ',') + "\t" + "{:.2f}".format(consumption_per_day[2]).replace('.', ',') + "\t\t" + "{:.2f}".format(production_per_day[0]).replace('.', ',') + "\t" + "{:.2f}".format(production_per_day[1]).replace('.', ',') + "\t" + "{:.2f}".format(production_per_day[2]).replace('.', ',') + "\n")
-                elif line[0].date() == currentDate:
-                    consumption_per_day[0] += consumption_per_hour(line)[0]
-                    consumption_per_day[1] += consumption_per_hour(line)[1]
-                    consumption_per_day[2] += consumption_per_hour(line)[2]
-                    production_per_day[0] += production_per_hour(line)[0]
-                    production_per_day[1] += production_per_hour(line)[1]
-                    production_per_day[2] += production_per_hour(line)[2]
-                elif finnish_day == "Tiistai" or finnish_day == "Torstai":
-                    file.write(finnish_day + "\t\t" + date_str + "\t\t" + "{:.2f}".format(consumption_per_day[0]).replace('.', ',') + "\t" + "{:.2f}".format(consumption_per_day[1]).replace('.', ',') + "\t" + "{:.2f}".format(consumption_per_day[2]).replace('.', ',') + "\t\t" + "{:.2f}".format(production_per_day[0]).replace('.', ',') + "\t" + "{:.2f}".format(production_per_day[1]).replace('.', ',') + "\t" + "{:.2f}".format(production_per_day[2]).replace('.', ',') + "\n")
-                    currentDate = line[0].date() 
-                    consumption_per_day = [0.0, 0.0, 0.0]
-                    production_per_day = [0.0, 0.0, 0.0]
-                else:
-                    file.write(finnish_day + "\t" + date_str + "\t\t" + "{:.2f}".format(consumption_per_day[0]).replace('.', ',') + "\t" + "{:.2f}".format(consumption_per_day[1]).replace('.', ',') + "\t" + "{:.2f}".format(consumption_per_day[2]).replace('.', ',') + "\t\t" + "{:.2f}".format(production_per_day[0]).replace('.', ',') + "\t" + "{:.2f}".format(production_per_day[1]).replace('.', ',') + "\t" + "{:.2f}".format(production_per_day[2]).replace('.', ',') + "\n")
-                    currentDate = line[0].date() 
-                    consumption_per_day = [0.0, 0.0, 0.0]
-                    production_per_day = [0.0, 0.0, 0.0]
+    rendered = {weekly_data: (week_num, source_hash, section)}
+    write_manifest(report_file, splice_sections(report_file, sections, rendered))
+    return True
+
+def build_report_from_weeks(report_file: str, weekly_files: list[str], workers: int | None = None, use_cache: bool = True, rebuild_cache: bool = False) -> None:
+    """Builds a new report from the given weekly data files.
+
+    The weeks are read and rendered in a process pool and the sections are written
+    in the order of weekly_files with a single write.
+    """
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        sections = list(executor.map(build_week_section, weekly_files, repeat(use_cache), repeat(rebuild_cache)))
+    with open(Path(report_file), "w", encoding="utf-8") as file:
+        file.write("")
+    rendered = {}
+    for weekly_file, (week_num, section) in zip(weekly_files, sections):
+        rendered[weekly_file] = (week_num, file_hash(weekly_file).hex(), section)
+    write_manifest(report_file, splice_sections(report_file, [], rendered))
+
+def update_report(report_file: str, weekly_files: list[str], workers: int | None = None, use_cache: bool = True, rebuild_cache: bool = False) -> None:
+    """Brings the report up to date with the given weekly data files.
+
+    Weeks whose data file is unchanged since the last run are skipped, changed
+    weeks are replaced in place, new weeks are inserted in week order and weeks
+    whose data file is gone are removed. Without a valid manifest the whole
+    report is rebuilt.
+    """
+    sections = read_manifest(report_file)
+    if sections is None:
+        build_report_from_weeks(report_file, weekly_files, workers, use_cache, rebuild_cache)
+        print("\n**Raportti rakennettu uudelleen, viikkoja: " + str(len(weekly_files)) + ".**")
+        return
+    pending = []
+    hashes = {}
+    for weekly_file in weekly_files:
+        hashes[weekly_file] = file_hash(weekly_file).hex()
+        entry = find_section(sections, weekly_file)
+        if entry is None or entry["hash"] != hashes[weekly_file]:
+            pending.append(weekly_file)
+    removed = [entry for entry in sections if not Path(entry["source"]).is_file()]
+    rendered = {}
+    if pending:
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            built = list(executor.map(build_week_section, pending, repeat(use_cache), repeat(rebuild_cache)))
+        for weekly_file, (week_num, section) in zip(pending, built):
+            rendered[weekly_file] = (week_num, hashes[weekly_file], section)
+    if rendered or removed:
+        write_manifest(report_file, splice_sections(report_file, sections, rendered))
+    print("\n**Päivitettyjä tai uusia viikkoja: " + str(len(pending)) + ", muuttumattomia: " + str(len(weekly_files) - len(pending)) + ", poistettuja: " + str(len(removed)) + ".**")
 
 def main():
     """Main function to execute the report generation."""
 
+    args = read_arguments()
+    if args.update:
+        update_report(args.report, find_weekly_files(), args.workers, not args.no_cache, args.rebuild_cache)
+        return
+
     """Asks for report file name"""
     report_file_name = input("\nSyötä käsiteltävän raporttitiedoston nimi tai jätä tyhjäksi (oletus: yhteenveto.txt) - lopeta syöttämällä 9: ")
     if report_file_name == "9":
@@ -322,8 +273,8 @@ def main():
                     break
                 elif Path(weekly_data + ".csv").is_file():
                     weekly_data = weekly_data + ".csv"
-                    add_to_report(weekly_data, report_file_name)
-                    print("\n**Viikon tiedot lisätty raporttiin.**\n")
+                    if add_to_report(weekly_data, report_file_name, not args.no_cache, args.rebuild_cache):
+                        print("\n**Viikon tiedot lisätty raporttiin.**\n")
                     break
                 else:
                     print("\n**Viikon datatiedostoa ei löydy.**")
@@ -340,7 +291,7 @@ def main():
                     break
                 elif Path(weekly_data + ".csv").is_file():
                     weekly_data = weekly_data + ".csv"
-                    write_new_report(weekly_data, report_file_name)
+                    write_new_report(weekly_data, report_file_name, not args.no_cache, args.rebuild_cache)
                     print("\n**Viikon tiedot lisätty raporttiin.**\n")
                     break
                 else:
@@ -350,18 +301,11 @@ def main():
             secondary_menu()
             while True:
                 if confirmation_prompt(report_file_name) == False:
-                    print("\n**Uuden raportin luonti peruutettu.**\n")
+                    print("\n**Raportin päivitys peruutettu.**\n")
                     break
                 else:
-                    erase_report(report_file_name)
-                    for week in range(1, 53):
-                        week_str = str(week).zfill(2)
-                        weekly_file = "viikko" + week_str + ".csv"
-                        if Path(weekly_file).is_file():
-                            add_to_report("viikko" + week_str + ".csv", report_file_name)
-                        else:
-                            pass
-                    print("\n**Uusi raportti luotu kaikista viikoista (Tyhjät viikot ohitettu).**\n")
+                    update_report(report_file_name, find_weekly_files(), args.workers, not args.no_cache, args.rebuild_cache)
+                    print("\n**Raportti päivitetty kaikista viikoista (Tyhjät ja muuttumattomat viikot ohitettu).**\n")
                     break
         elif input_value == 4:
             secondary_menu()
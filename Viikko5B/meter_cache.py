@@ -0,0 +1,84 @@
+# Copyright 2025 Niko Hätälä
+# License: MIT
+
+from array import array
+import hashlib
+import mmap
+import os
+from pathlib import Path
+import struct
+
+CACHE_MAGIC = b"MTRC"
+CACHE_VERSION = 1
+HEADER = struct.Struct("<4sHHQq32sQ")
+COLUMN = struct.Struct("<16sc7x")
+
+def cache_path(csv_file: str) -> Path:
+    """Returns the path of the cache file kept next to the CSV file."""
+    return Path(str(csv_file) + ".cache")
+
+def file_hash(csv_file: str) -> bytes:
+    """Calculates the SHA-256 hash of the CSV file."""
+    digest = hashlib.sha256()
+    with open(csv_file, "rb") as file:
+        for chunk in iter(lambda: file.read(1 << 20), b""):
+            digest.update(chunk)
+    return digest.digest()
+
+def save_cached_columns(csv_file: str, columns: dict[str, array]) -> None:
+    """Writes the parsed columns of a CSV file to its cache file.
+
+    Every column is padded to 8 bytes so the columns can be cast directly
+    from the memory map when loading.
+    """
+    stat = os.stat(csv_file)
+    rows = len(next(iter(columns.values()))) if columns else 0
+    target = cache_path(csv_file)
+    temporary = target.with_name(target.name + ".tmp")
+    with open(temporary, "wb") as file:
+        file.write(HEADER.pack(CACHE_MAGIC, CACHE_VERSION, len(columns), stat.st_size, stat.st_mtime_ns, file_hash(csv_file), rows))
+        for name, column in columns.items():
+            file.write(COLUMN.pack(name.encode("utf-8"), column.typecode.encode("ascii")))
+        for column in columns.values():
+            data = column.tobytes()
+            file.write(data)
+            file.write(b"\0" * (-len(data) % 8))
+    os.replace(temporary, target)
+
+def load_cached_columns(csv_file: str) -> dict[str, memoryview] | None:
+    """Loads the columns of a CSV file from its cache file.
+
+    The columns are read-only memoryviews into a memory map of the cache file.
+    Returns None if there is no cache or it does not match the CSV file. A cache
+    whose modification time differs is still used if the content hash matches.
+    """
+    target = cache_path(csv_file)
+    if not target.is_file():
+        return None
+    stat = os.stat(csv_file)
+    with open(target, "rb") as file:
+        try:
+            cache = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+        except ValueError:
+            return None
+    if len(cache) < HEADER.size:
+        return None
+    magic, version, column_count, size, mtime_ns, content_hash, rows = HEADER.unpack_from(cache)
+    if magic != CACHE_MAGIC or version != CACHE_VERSION or size != stat.st_size:
+        return None
+    if mtime_ns != stat.st_mtime_ns:
+        if content_hash != file_hash(csv_file):
+            return None
+        with open(target, "r+b") as file:
+            file.write(HEADER.pack(magic, version, column_count, size, stat.st_mtime_ns, content_hash, rows))
+    columns = {}
+    offset = HEADER.size + column_count * COLUMN.size
+    for number in range(column_count):
+        name, typecode = COLUMN.unpack_from(cache, HEADER.size + number * COLUMN.size)
+        typecode = typecode.decode("ascii")
+        length = rows * array(typecode).itemsize
+        if offset + length > len(cache):
+            return None
+        columns[name.rstrip(b"\0").decode("utf-8")] = memoryview(cache)[offset:offset + length].cast(typecode)
+        offset += length + (-length % 8)
+    return columns
@@ -0,0 +1,55 @@
+# Copyright 2025 Niko Hätälä
+# License: MIT
+
+from array import array
+from bisect import bisect_left
+from datetime import date, timedelta
+from operator import itemgetter
+
+PHASE_VALUES = 6
+
+def phase_matrix(meter_data: list) -> array:
+    """Builds a (rows x 6) float matrix of the phase values of the meter data rows.
+
+    The matrix is stored column by column: consumption phases 1-3 and production
+    phases 1-3, each column holding one value per row.
+    """
+    matrix = array("d")
+    for column in range(1, PHASE_VALUES + 1):
+        matrix.extend(map(itemgetter(column), meter_data))
+    return matrix
+
+def day_boundaries(meter_data: list) -> list[tuple[date, int, int]]:
+    """Returns (date, start, stop) row ranges of every day in the chronological meter data."""
+    rows = len(meter_data)
+    row_date = lambda index: meter_data[index][0].date()
+    boundaries = []
+    start = 0
+    while start < rows:
+        day = row_date(start)
+        stop = start + bisect_left(range(start, rows), day + timedelta(days=1), key=row_date)
+        boundaries.append((day, start, stop))
+        start = stop
+    return boundaries
+
+def aggregate_days(meter_data: list) -> list[list]:
+    """Sums the phase values of every day.
+
+    Returns one row per day: [date, consumption p1, p2, p3, production p1, p2, p3,
+    net consumption], where net consumption is consumption - production over all phases.
+    """
+    rows = len(meter_data)
+    matrix = memoryview(phase_matrix(meter_data))
+    days = []
+    for day, start, stop in day_boundaries(meter_data):
+        totals = [sum(matrix[column * rows + start:column * rows + stop]) for column in range(PHASE_VALUES)]
+        days.append([day] + totals + [sum(totals[:3]) - sum(totals[3:])])
+    return days
+
+def best_day(days: list[list]) -> list:
+    """Returns the day with the lowest net consumption."""
+    return min(days, key=itemgetter(7))
+
+def week_totals(days: list[list]) -> list[float]:
+    """Sums the daily phase totals: [consumption p1, p2, p3, production p1, p2, p3]."""
+    return [sum(map(itemgetter(column), days)) for column in range(1, PHASE_VALUES + 1)]
@@ -0,0 +1,116 @@
+# Copyright 2025 Niko Hätälä
+# License: MIT
+
+import json
+import os
+from pathlib import Path
+
+MANIFEST_VERSION = 1
+
+def manifest_path(report_file: str) -> Path:
+    """Returns the path of the manifest kept next to the report file."""
+    return Path(str(report_file) + ".manifest.json")
+
+def read_manifest(report_file: str) -> list[dict] | None:
+    """Returns the section entries of the report.
+
+    Every entry has the source data file, its week number and SHA-256 hash, and
+    the byte offsets start..end of the section in the report. Returns None if there
+    is no manifest or the report has been changed since the manifest was written.
+    """
+    path = manifest_path(report_file)
+    if not path.is_file() or not Path(report_file).is_file():
+        return None
+    try:
+        with open(path, "r", encoding="utf-8") as file:
+            manifest = json.load(file)
+    except (OSError, ValueError):
+        return None
+    stat = os.stat(report_file)
+    if manifest.get("version") != MANIFEST_VERSION or manifest.get("report_size") != stat.st_size or manifest.get("report_mtime_ns") != stat.st_mtime_ns:
+        return None
+    return manifest["sections"]
+
+def write_manifest(report_file: str, sections: list[dict]) -> None:
+    """Writes the manifest of the report file as it is now."""
+    stat = os.stat(report_file)
+    manifest = {
+        "version": MANIFEST_VERSION,
+        "report_size": stat.st_size,
+        "report_mtime_ns": stat.st_mtime_ns,
+        "sections": sections
+    }
+    with open(manifest_path(report_file), "w", encoding="utf-8") as file:
+        json.dump(manifest, file, indent=2)
+
+def remove_manifest(report_file: str) -> None:
+    """Removes the manifest of the report file if it exists."""
+    manifest_path(report_file).unlink(missing_ok=True)
+
+def find_section(sections: list[dict], source: str) -> dict | None:
+    """Returns the entry of the section made from the given data file."""
+    for entry in sections:
+        if entry["source"] == source:
+            return entry
+    return None
+
+def splice_sections(report_file: str, sections: list[dict], rendered: dict[str, tuple[int, str, str]]) -> list[dict]:
+    """Writes rendered sections into the report and returns the updated entries.
+
+    rendered maps a source data file to (week number, source hash, section text).
+    Sections already in the report are replaced in place, the others are inserted
+    in week number order and sections whose data file no longer exists are
+    removed. Only the part of the report from the first change onwards is
+    rewritten. Content outside the known sections is kept.
+    """
+    report = Path(report_file)
+    size = report.stat().st_size if report.is_file() else 0
+    sections = sorted(sections, key=lambda entry: entry["start"])
+    kept = [entry for entry in sections if entry["source"] in rendered or Path(entry["source"]).is_file()]
+    pieces = []
+    for entry in sections:
+        if entry not in kept:
+            pieces.append((entry["start"], entry["end"], None, b""))
+        elif entry["source"] in rendered:
+            week, source_hash, text = rendered[entry["source"]]
+            pieces.append((entry["start"], entry["end"], {"source": entry["source"], "week": week, "hash": source_hash}, text.encode("utf-8")))
+        else:
+            pieces.append((entry["start"], entry["end"], dict(entry), None))
+    new_sources = sorted((week, source) for source, (week, _, _) in rendered.items() if find_section(sections, source) is None)
+    for week, source in new_sources:
+        following = [position for position, entry in enumerate(kept) if entry["week"] > week]
+        if following and following[0] == 0:
+            offset = kept[0]["start"]
+        elif following:
+            offset = kept[following[0] - 1]["end"]
+        else:
+            offset = kept[-1]["end"] if kept else size
+        _, source_hash, text = rendered[source]
+        pieces.append((offset, offset, {"source": source, "week": week, "hash": source_hash}, text.encode("utf-8")))
+    pieces.sort(key=lambda piece: (piece[0], piece[1]))
+    changed = [piece for piece in pieces if piece[3] is not None]
+    first_change = changed[0][0] if changed else size
+    updated = [piece[2] for piece in pieces if piece[0] < first_change]
+    with open(report, "r+b" if report.is_file() else "w+b") as file:
+        file.seek(first_change)
+        tail = file.read()
+        output = []
+        offset = first_change
+        cursor = first_change
+        for start, end, entry, data in pieces[len(updated):]:
+            gap = tail[cursor - first_change:start - first_change]
+            output.append(gap)
+            offset += len(gap)
+            if data is None:
+                data = tail[start - first_change:end - first_change]
+            output.append(data)
+            if entry is not None:
+                entry["start"], entry["end"] = offset, offset + len(data)
+                updated.append(entry)
+            offset += len(data)
+            cursor = end
+        output.append(tail[cursor - first_change:])
+        file.seek(first_change)
+        file.write(b"".join(output))
+        file.truncate()
+    return updated
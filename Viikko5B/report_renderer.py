@@ -0,0 +1,37 @@
+# Copyright 2025 Niko Hätälä
+# License: MIT
+
+from datetime import date
+
+FINNISH_DAY_NAMES = ("Maanantai", "Tiistai", "Keskiviikko", "Torstai", "Perjantai", "Lauantai", "Sunnuntai")
+
+class WeeklyReportRenderer:
+    """Renders the weekly report sections with a table layout compiled once.
+
+    The header and row layouts are prepared as format strings when the renderer is
+    created. A row is rendered with two format calls and a single decimal comma
+    replace, and a whole section is joined into one string.
+    """
+    def __init__(self):
+        self.header_format = (
+            "\n\n\nRaportin luonti-/muokkauspäivä: {}\n"
+            "\n"
+            "Viikon {} sähkönkulutus ja -tuotanto (kWh, vaiheittain)\n"
+            "Päivä\t\tPvm\t\t\t\tKulutus [kWh]\t\t\t\tTuotanto [kWh]\n"
+            "\t\t\t(pp.kk.vvvv)\tv1\t\tv2\t\tv3\t\t\tv1\t\tv2\t\tv3\n"
+            "-----------------------------------------------------------------------------------\n"
+        )
+        # Names shorter than a tab stop need two tabs to reach the date column.
+        self.day_formats = tuple(name + ("\t\t" if len(name) < 8 else "\t") + "{0.day:02d}.{0.month:02d}.{0.year}" for name in FINNISH_DAY_NAMES)
+        self.values_format = "\t\t{:.2f}\t{:.2f}\t{:.2f}\t\t{:.2f}\t{:.2f}\t{:.2f}\n"
+
+    def render_row(self, day: list) -> str:
+        """Renders one day: [date, consumption p1, p2, p3, production p1, p2, p3, ...]."""
+        values = self.values_format.format(day[1], day[2], day[3], day[4], day[5], day[6])
+        return self.day_formats[day[0].weekday()].format(day[0]) + values.replace(".", ",")
+
+    def render_section(self, week_num: int, days: list[list], report_date: date) -> str:
+        """Renders the header and the daily rows of one week."""
+        parts = [self.header_format.format(report_date.strftime("%d.%m.%Y"), week_num)]
+        parts.extend(map(self.render_row, days))
+        return "".join(parts)
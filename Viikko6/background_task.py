@@ -0,0 +1,79 @@
+# Copyright 2025 Niko Hätälä
+# License: MIT
+
+import os
+import threading
+
+class Progress:
+    """Progress of a background task as processed and total units, e.g. bytes of a file.
+
+    Only the task updates it and the menu thread only reads it, so no lock is needed.
+    """
+    def __init__(self):
+        self.done = 0
+        self.total = 0
+
+    def start(self, total: int) -> None:
+        self.done = 0
+        self.total = total
+
+    def advance(self, amount: int) -> None:
+        self.done += amount
+
+    def percent(self) -> int | None:
+        """Returns the progress as a whole percentage, or None if the total is not known."""
+        if self.total <= 0:
+            return None
+        return min(100, self.done * 100 // self.total)
+
+class BackgroundTask:
+    """Runs a function in a daemon thread.
+
+    The function gets a Progress object as its progress keyword argument. The
+    thread does not keep the program running if the user quits while it works.
+    """
+    def __init__(self, function, *args, **kwargs):
+        self.progress = Progress()
+        self.finished = threading.Event()
+        self.value = None
+        self.error = None
+        kwargs["progress"] = self.progress
+        threading.Thread(target=self._run, args=(function, args, kwargs), daemon=True).start()
+
+    def _run(self, function, args: tuple, kwargs: dict) -> None:
+        try:
+            self.value = function(*args, **kwargs)
+        except BaseException as error:
+            self.error = error
+        finally:
+            self.finished.set()
+
+    def done(self) -> bool:
+        return self.finished.is_set()
+
+    def result(self, message: str, interval: float = 0.25):
+        """Waits for the task and returns its result, raising its exception if it failed.
+
+        While waiting, the message and the progress are printed on one line. Nothing
+        is printed if the task has already finished.
+        """
+        waited = False
+        while not self.finished.wait(interval):
+            percent = self.progress.percent()
+            print(f"\r{message}..." + ("" if percent is None else f" {percent} %"), end="", flush=True)
+            waited = True
+        if waited:
+            print(f"\r{message}... valmis.")
+        if self.error is not None:
+            raise self.error
+        return self.value
+
+def tracked_lines(file, progress: Progress | None):
+    """Yields the lines of a text file and advances the progress by their length."""
+    if progress is None:
+        yield from file
+        return
+    progress.start(os.fstat(file.fileno()).st_size)
+    for line in file:
+        progress.advance(len(line))
+        yield line
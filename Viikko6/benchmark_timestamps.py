@@ -0,0 +1,62 @@
+# Copyright 2025 Niko Hätälä
+# License: MIT
+
+"""Micro-benchmark of the meter timestamp parsers.
+
+Compares the parsers used before (datetime.fromisoformat in Viikko6, datetime.strptime
+in Viikko5 and Viikko5B) with HourlyTimestampParser on the timestamps of 2025.csv.
+
+Usage:
+    python benchmark_timestamps.py
+"""
+
+from datetime import datetime
+import timeit
+from timestamp_parser import HourlyTimestampParser
+
+def read_timestamps(meter_datafile: str) -> list[str]:
+    """Reads the timestamp column of a meter data file."""
+    with open(meter_datafile, "r", encoding="utf-8") as file:
+        return [line.split(";")[0] for line in file if not line.startswith("Aika")]
+
+def fromisoformat_epoch(timestamps: list[str]) -> list[tuple[int, int]]:
+    """Previous Viikko6 path: fromisoformat and conversion to epoch seconds."""
+    epochs = []
+    for timestamp in timestamps:
+        date_time = datetime.fromisoformat(timestamp)
+        epochs.append((int(date_time.timestamp()), int(date_time.utcoffset().total_seconds())))
+    return epochs
+
+def parser_epoch(timestamps: list[str]) -> list[tuple[int, int]]:
+    timestamp_parser = HourlyTimestampParser()
+    return [timestamp_parser.parse_epoch(timestamp) for timestamp in timestamps]
+
+def strptime_datetime(timestamps: list[str]) -> list[datetime]:
+    """Previous Viikko5 and Viikko5B path."""
+    return [datetime.strptime(timestamp, "%Y-%m-%dT%H:%M:%S") for timestamp in timestamps]
+
+def parser_datetime(timestamps: list[str]) -> list[datetime]:
+    timestamp_parser = HourlyTimestampParser()
+    return [timestamp_parser.parse_datetime(timestamp) for timestamp in timestamps]
+
+def measure(function, timestamps: list) -> float:
+    """Returns the best time per timestamp in microseconds."""
+    best = min(timeit.repeat(lambda: function(timestamps), number=1, repeat=5))
+    return best / len(timestamps) * 1e6
+
+def main():
+    timestamps = read_timestamps("2025.csv")
+    naive_timestamps = [timestamp[:19] for timestamp in timestamps]
+    if fromisoformat_epoch(timestamps) != parser_epoch(timestamps) or strptime_datetime(naive_timestamps) != parser_datetime(naive_timestamps):
+        raise SystemExit("Jäsentimet antavat eri tuloksen.")
+    print(f"Aikaleimoja: {len(timestamps)}")
+    for name, function, data in [
+        ("datetime.fromisoformat + epoch", fromisoformat_epoch, timestamps),
+        ("HourlyTimestampParser.parse_epoch", parser_epoch, timestamps),
+        ("datetime.strptime", strptime_datetime, naive_timestamps),
+        ("HourlyTimestampParser.parse_datetime", parser_datetime, naive_timestamps)
+    ]:
+        print(f"{name:<40}{measure(function, data):8.3f} µs / rivi")
+
+if __name__ == "__main__":
+    main()
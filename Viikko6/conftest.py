@@ -0,0 +1,17 @@
+# Copyright 2025 Niko Hätälä
+# License: MIT
+
+from datetime import datetime, timedelta, timezone
+import random
+import pytest
+from meter_store import MeterStore
+
+@pytest.fixture
+def store() -> MeterStore:
+    """Returns 60 days of random hourly rows from 1.3.2025 with the decimals of the meter exports."""
+    values = random.Random(2025)
+    store = MeterStore()
+    start = datetime(2025, 3, 1, tzinfo=timezone(timedelta(hours=2)))
+    for hour in range(24 * 60):
+        store.append(start + timedelta(hours=hour), values.randrange(0, 6000) / 1000, values.randrange(0, 3000) / 1000, values.randrange(-200, 300) / 10)
+    return store
@@ -0,0 +1,166 @@
+# Copyright 2025 Niko Hätälä
+# License: MIT
+
+from array import array
+from datetime import date, timedelta
+from itertools import repeat
+import math
+import operator
+from meter_store import MILLI, MeterStore, to_milli
+from rollup_index import RollupIndex
+from timestamp_parser import HourlyTimestampParser
+
+SECONDS_PER_HOUR = 3600
+DAY_TARIFF_HOURS = range(7, 22)
+# Prices are summed as integer millionths of a snt, energy as milli-kWh.
+PRICE_SCALE = 1_000_000
+EURO_SCALE = MILLI * PRICE_SCALE * 100
+
+def to_micro(price: float) -> int:
+    """Returns the snt/kWh price in integer millionths of a snt."""
+    return round(price * PRICE_SCALE)
+
+class PriceSeries:
+    """Hourly spot prices in snt/kWh.
+
+    The prices are a dense float64 array with one slot per hour from first_hour
+    (hours since 1970-01-01 UTC). Hours without a price are NaN.
+    """
+    def __init__(self, first_hour: int, prices: array):
+        self.first_hour = first_hour
+        self.prices = prices
+
+    @classmethod
+    def from_csv(cls, price_file: str) -> "PriceSeries":
+        """Reads a 'Aika;Hinta' CSV file with a header row, ISO timestamps and decimal commas."""
+        timestamp_parser = HourlyTimestampParser()
+        hours = array("q")
+        values = array("d")
+        with open(price_file, "r", encoding="utf-8") as file:
+            for line in file:
+                fields = line.strip().split(";")
+                if fields[0] == "Aika" or fields[0] == "":
+                    continue
+                timestamp, _ = timestamp_parser.parse_epoch(fields[0])
+                if timestamp % SECONDS_PER_HOUR:
+                    raise ValueError(f"Hinnan aika ei ole tasatunti: {fields[0]}")
+                hours.append(timestamp // SECONDS_PER_HOUR)
+                values.append(float(fields[1].replace(",", ".")))
+        if len(hours) == 0:
+            raise ValueError(f"Hintatiedostossa {price_file} ei ole hintoja.")
+        first_hour = min(hours)
+        prices = array("d", repeat(math.nan, max(hours) - first_hour + 1))
+        for hour, value in zip(hours, values):
+            prices[hour - first_hour] = value
+        return cls(first_hour, prices)
+
+    def price_at(self, timestamp: int) -> float:
+        index = timestamp // SECONDS_PER_HOUR - self.first_hour
+        return self.prices[index] if 0 <= index < len(self.prices) and timestamp % SECONDS_PER_HOUR == 0 else math.nan
+
+    def aligned(self, timestamps) -> array:
+        """Returns the price of every timestamp (epoch seconds), in the same order.
+
+        Hourly rows without gaps, like a meter export, are one slice of the price
+        array. Raises ValueError if some hour has no price.
+        """
+        rows = len(timestamps)
+        if rows == 0:
+            return array("d")
+        first = timestamps[0] // SECONDS_PER_HOUR - self.first_hour
+        contiguous = timestamps[0] % SECONDS_PER_HOUR == 0 and timestamps[-1] - timestamps[0] == (rows - 1) * SECONDS_PER_HOUR
+        if contiguous and first >= 0 and first + rows <= len(self.prices):
+            prices = self.prices[first:first + rows]
+        else:
+            prices = array("d", map(self.price_at, timestamps))
+        missing = sum(map(math.isnan, prices))
+        if missing:
+            raise ValueError(f"Hintatiedostosta puuttuu {missing} tunnin hinta.")
+        return prices
+
+class TimeOfUseTariff:
+    """Day and night transfer prices in snt/kWh by the local hour of the day."""
+    def __init__(self, day_price: float = 0.0, night_price: float = 0.0):
+        self.hourly_prices = [day_price if hour in DAY_TARIFF_HOURS else night_price for hour in range(24)]
+
+    def aligned(self, store: MeterStore) -> array:
+        """Returns the tariff of every row of the store."""
+        local_seconds = map(operator.add, store.timestamps, store.utc_offsets)
+        local_hours = map(operator.mod, map(operator.floordiv, local_seconds, repeat(SECONDS_PER_HOUR)), repeat(24))
+        return array("d", map(self.hourly_prices.__getitem__, local_hours))
+
+class MeterCosts:
+    """Hourly electricity costs of a MeterStore with daily prefix sums.
+
+    Energy costs consumption * (spot price + margin), transfer costs consumption *
+    time-of-use tariff and production is compensated at production * (spot price -
+    sale margin). All prices are in snt/kWh and the results in euros. Like the
+    RollupIndex sums, the costs are exact integers: energy in milli-kWh times
+    prices in millionths of a snt (finer price decimals are rounded off). Any
+    date range is a difference of the daily prefix sums and is only rounded when
+    it is divided into euros, so it equals the row-by-row sum of the same
+    integers.
+    """
+    def __init__(self, store: MeterStore, rollups: RollupIndex, prices: PriceSeries, tariff: TimeOfUseTariff = None,
+                 margin: float = 0.0, sale_margin: float = 0.0):
+        self.store = store
+        self.rollups = rollups
+        spot = list(map(to_micro, prices.aligned(store.timestamps)))
+        tariff = tariff or TimeOfUseTariff()
+        consumption = list(map(to_milli, store.consumption))
+        production = list(map(to_milli, store.production))
+        energy = list(map(operator.mul, consumption, map(operator.add, spot, repeat(to_micro(margin)))))
+        transfer = list(map(operator.mul, consumption, map(to_micro, tariff.aligned(store))))
+        compensation = list(map(operator.mul, production, map(operator.sub, spot, repeat(to_micro(sale_margin)))))
+        self.energy_sums = self._prefix_sums(energy)
+        self.transfer_sums = self._prefix_sums(transfer)
+        self.compensation_sums = self._prefix_sums(compensation)
+
+    def _prefix_sums(self, values: list[int]) -> list[int]:
+        """Sums the values of every rollup day and returns the running totals."""
+        day_starts = self.rollups.day_starts
+        sums = [0]
+        for day in range(len(self.rollups.days)):
+            sums.append(sums[-1] + sum(values[day_starts[day]:day_starts[day + 1]]))
+        return sums
+
+    def _exact_costs(self, start: int, stop: int) -> list[int]:
+        """Returns the exact [energy, transfer, compensation, net cost] between day positions start..stop."""
+        energy = self.energy_sums[stop] - self.energy_sums[start]
+        transfer = self.transfer_sums[stop] - self.transfer_sums[start]
+        compensation = self.compensation_sums[stop] - self.compensation_sums[start]
+        return [energy, transfer, compensation, energy + transfer - compensation]
+
+    def range_costs(self, start_date: date, end_date: date) -> list[float]:
+        """Returns [energy, transfer, compensation, net cost] in euros between start_date and end_date (inclusive)."""
+        return [total / EURO_SCALE for total in self._exact_costs(*self.rollups.day_range(start_date, end_date))]
+
+    def month_costs(self, month: int) -> list[float]:
+        """Returns the range_costs of the given month number summed over all years."""
+        totals = [0, 0, 0, 0]
+        if len(self.store) == 0:
+            return [0.0, 0.0, 0.0, 0.0]
+        for year in range(self.store.first_date().year, self.store.last_date().year + 1):
+            month_start = date(year, month, 1)
+            month_end = date(year, 12, 31) if month == 12 else date(year, month + 1, 1) - timedelta(days=1)
+            totals = list(map(operator.add, totals, self._exact_costs(*self.rollups.day_range(month_start, month_end))))
+        return [total / EURO_SCALE for total in totals]
+
+    def period_costs(self, period: str = "month") -> list[list]:
+        """Returns the costs of every day, month or year in the data.
+
+        period is "day", "month" or "year". Every row is [period start date,
+        energy, transfer, compensation, net cost].
+        """
+        truncate = {
+            "day": lambda day: day,
+            "month": lambda day: day.replace(day=1),
+            "year": lambda day: day.replace(month=1, day=1)
+        }[period]
+        rows = []
+        for position, ordinal in enumerate(self.rollups.days):
+            key = truncate(date.fromordinal(ordinal))
+            if not rows or rows[-1][0] != key:
+                rows.append([key, 0, 0, 0, 0])
+            rows[-1][1:] = map(operator.add, rows[-1][1:], self._exact_costs(position, position + 1))
+        return [[row[0]] + [total / EURO_SCALE for total in row[1:]] for row in rows]
@@ -0,0 +1,106 @@
+# Copyright 2025 Niko Hätälä
+# License: MIT
+
+from concurrent.futures import ProcessPoolExecutor
+from itertools import repeat
+from pathlib import Path
+from rollup_index import RollupIndex
+import report_maker
+
+def find_site_files(directory: str) -> list[Path]:
+    """Returns the meter data CSV files under the directory, sorted by path."""
+    return sorted(Path(directory).rglob("*.csv"))
+
+def summarize_site(meter_datafile: Path, use_cache: bool = True, save_cache: bool = False) -> list:
+    """Reads the meter data of one site and summarizes its whole period.
+
+    An existing cache of the file is used, but a new one is only written with save_cache.
+
+    Returns [data file, daily_summary list, rows, temperature sum, error]. The
+    summary is None and error a message if the file could not be read.
+    """
+    try:
+        meter_data = report_maker.read_meter_data(str(meter_datafile), use_cache, save_cache=save_cache)
+        if len(meter_data) == 0:
+            return [meter_datafile, None, 0, 0.0, "datatiedostossa ei ole rivejä"]
+        rollups = RollupIndex(meter_data)
+        first_date, last_date = meter_data.first_date(), meter_data.last_date()
+        summary = report_maker.daily_summary(meter_data, first_date, last_date, rollups)
+        totals = rollups.range_summary(first_date, last_date)
+    except (OSError, ValueError, IndexError) as error:
+        return [meter_datafile, None, 0, 0.0, str(error)]
+    return [meter_datafile, summary, totals[4], totals[2], None]
+
+def summarize_sites(site_files: list[Path], workers: int | None = None, chunksize: int = 1, use_cache: bool = True, save_cache: bool = False) -> list[list]:
+    """Summarizes the sites in a process pool, chunksize files per task, in the order of site_files."""
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        return list(executor.map(summarize_site, site_files, repeat(use_cache), repeat(save_cache), chunksize=chunksize))
+
+def fleet_summary(sites: list[list]) -> list:
+    """Combines the site summaries.
+
+    Returns [consumption, production, average temperature, net load, highest,
+    lowest, start date, end date, sites, rows, highest site, lowest site], where
+    highest and lowest are (datetime, consumption, temperature) of the extreme
+    hours over all sites. The average temperature is weighted by the number of
+    rows of every site.
+    """
+    consumption = production = temperature = net_load = 0.0
+    rows = 0
+    highest = lowest = None
+    highest_site = lowest_site = None
+    start_date = end_date = None
+    summarized = [site for site in sites if site[1] is not None]
+    for meter_datafile, summary, site_rows, site_temperature, _ in summarized:
+        consumption += summary[0]
+        production += summary[1]
+        net_load += summary[3]
+        temperature += site_temperature
+        rows += site_rows
+        if highest is None or summary[4][1] > highest[1]:
+            highest, highest_site = summary[4], meter_datafile
+        if lowest is None or summary[5][1] < lowest[1]:
+            lowest, lowest_site = summary[5], meter_datafile
+        start_date = summary[6] if start_date is None else min(start_date, summary[6])
+        end_date = summary[7] if end_date is None else max(end_date, summary[7])
+    average_temperature = temperature / rows if rows else 0.0
+    return [consumption, production, average_temperature, net_load, highest, lowest, start_date, end_date, len(summarized), rows, highest_site, lowest_site]
+
+def summary_lines(summary: list) -> list[str]:
+    """Formats the figures of a daily_summary list like the console report."""
+    finnish_date = report_maker.finnish_date
+    return [
+        f"Raportti aikaväliltä {finnish_date(summary[6])} - {finnish_date(summary[7])}:",
+        "-----------------------------------------",
+        f"Kokonaiskulutus: {round(summary[0], 2)} kWh",
+        f"Kokonaistuotanto: {round(summary[1], 2)} kWh",
+        f"Keskilämpötila: {round(summary[2], 2)} °C",
+        f"Nettokuorma: {round(summary[3], 2)} kWh",
+        f"Korkein kulutus: {round(summary[4][1], 2)} kWh / {finnish_date(summary[4][0])} / keskilämpötila: {round(summary[4][2], 2)} °C",
+        f"Matalin kulutus: {round(summary[5][1], 2)} kWh / {finnish_date(summary[5][0])} / keskilämpötila: {round(summary[5][2], 2)} °C"
+    ]
+
+def render_fleet_report(directory: str, sites: list[list]) -> str:
+    """Renders the site sections and the fleet summary as one report."""
+    lines = []
+    for meter_datafile, summary, _, _, error in sites:
+        lines.append(f"Kohde: {meter_datafile.relative_to(directory).with_suffix('')}")
+        lines.extend(summary_lines(summary) if error is None else [f"Virhe: {error}"])
+        lines.append("")
+    fleet = fleet_summary(sites)
+    lines.append(f"Kaikki kohteet ({fleet[8]} / {len(sites)} kohdetta, {fleet[9]} tuntia):")
+    if fleet[8]:
+        lines.extend(summary_lines(fleet[:8]))
+        lines[-2] += f" / {fleet[10].relative_to(directory).with_suffix('')}"
+        lines[-1] += f" / {fleet[11].relative_to(directory).with_suffix('')}"
+    return "\n".join(lines) + "\n"
+
+def write_fleet_report(directory: str, report_file: str, workers: int | None = None, chunksize: int = 1, use_cache: bool = True, save_cache: bool = False) -> int:
+    """Summarizes every site under the directory into one report file. Returns the number of sites.
+
+    Nothing is written into the site directory unless save_cache is set.
+    """
+    sites = summarize_sites(find_site_files(directory), workers, chunksize, use_cache, save_cache)
+    with open(report_file, "w", encoding="utf-8") as file:
+        file.write(render_fleet_report(directory, sites))
+    return len(sites)
@@ -0,0 +1,91 @@
+# Copyright 2025 Niko Hätälä
+# License: MIT
+
+from array import array
+from datetime import date, datetime, timedelta, timezone
+
+SECONDS_PER_DAY = 86400
+EPOCH_ORDINAL = date(1970, 1, 1).toordinal()
+MILLI = 1000
+
+def to_milli(value: float) -> int:
+    """Returns a meter value as whole thousandths.
+
+    The meter exports have at most three decimals, so sums of the returned
+    integers are exact.
+    """
+    return round(value * MILLI)
+
+class MeterStore:
+    """Columnar storage for hourly meter data.
+
+    Timestamps are kept as epoch seconds with the UTC offset of every row in its own
+    column, the measurements as float64 arrays. Rows must be in chronological order,
+    which is how the meter exports are written.
+    """
+    def __init__(self):
+        self.timestamps = array("q")
+        self.utc_offsets = array("i")
+        self.consumption = array("d")
+        self.production = array("d")
+        self.temperature = array("d")
+
+    def __len__(self) -> int:
+        return len(self.timestamps)
+
+    @classmethod
+    def from_columns(cls, columns: dict) -> "MeterStore":
+        """Creates a store from ready columns, for example memoryviews of a cache file.
+
+        A store created from read-only buffers cannot be appended to.
+        """
+        store = cls()
+        for name in store.columns():
+            setattr(store, name, columns[name])
+        return store
+
+    def columns(self) -> dict:
+        """Returns the columns of the store by name."""
+        return {
+            "timestamps": self.timestamps,
+            "utc_offsets": self.utc_offsets,
+            "consumption": self.consumption,
+            "production": self.production,
+            "temperature": self.temperature
+        }
+
+    def append(self, date_time: datetime, consumption: float, production: float, temperature: float) -> None:
+        """Adds one hourly row to the store."""
+        utc_offset = int(date_time.utcoffset().total_seconds())
+        self.append_epoch(int(date_time.timestamp()), utc_offset, consumption, production, temperature)
+
+    def append_epoch(self, timestamp: int, utc_offset: int, consumption: float, production: float, temperature: float) -> None:
+        """Adds one hourly row with the timestamp given as epoch seconds and UTC offset."""
+        self.timestamps.append(timestamp)
+        self.utc_offsets.append(utc_offset)
+        self.consumption.append(consumption)
+        self.production.append(production)
+        self.temperature.append(temperature)
+
+    def datetime_at(self, index: int) -> datetime:
+        """Returns the timestamp of a row as a timezone aware datetime."""
+        offset = timezone(timedelta(seconds=self.utc_offsets[index]))
+        return datetime.fromtimestamp(self.timestamps[index], offset)
+
+    def hour_at(self, index: int) -> tuple:
+        """Returns (datetime, consumption, temperature) of a row."""
+        return (self.datetime_at(index), self.consumption[index], self.temperature[index])
+
+    def day_ordinal_at(self, index: int) -> int:
+        """Returns the local calendar day of a row as a date ordinal."""
+        return (self.timestamps[index] + self.utc_offsets[index]) // SECONDS_PER_DAY + EPOCH_ORDINAL
+
+    def date_at(self, index: int) -> date:
+        """Returns the local date of a row."""
+        return date.fromordinal(self.day_ordinal_at(index))
+
+    def first_date(self) -> date:
+        return self.date_at(0)
+
+    def last_date(self) -> date:
+        return self.date_at(len(self) - 1)
@@ -0,0 +1,61 @@
+# Copyright 2025 Niko Hätälä
+# License: MIT
+
+from concurrent.futures import ProcessPoolExecutor
+import io
+import os
+from background_task import Progress
+from meter_store import MeterStore
+import report_maker
+
+def chunk_ranges(meter_datafile: str, chunks: int) -> list[tuple[int, int]]:
+    """Splits the file into about equal byte ranges that start at the beginning of a line."""
+    size = os.path.getsize(meter_datafile)
+    boundaries = [0]
+    with open(meter_datafile, "rb") as file:
+        for number in range(1, chunks):
+            position = size * number // chunks
+            if position <= boundaries[-1]:
+                continue
+            file.seek(position - 1)
+            file.readline()
+            if file.tell() >= size:
+                break
+            if file.tell() > boundaries[-1]:
+                boundaries.append(file.tell())
+    boundaries.append(size)
+    return list(zip(boundaries, boundaries[1:]))
+
+def parse_range(meter_datafile: str, start: int, stop: int) -> dict:
+    """Parses the lines in the byte range start..stop of the file like read_meter_data.
+
+    Returns the columns of a MeterStore.
+    """
+    with open(meter_datafile, "rb") as file:
+        file.seek(start)
+        data = file.read(stop - start)
+    with io.StringIO(data.decode("utf-8"), newline=None) as text:
+        lines = (line.strip().split(";") for line in text)
+        return report_maker.edit_data_types(line for line in lines if line[0] != "Aika").columns()
+
+def parallel_read_meter_data(meter_datafile: str, workers: int | None = None, chunks: int | None = None, progress: Progress = None) -> MeterStore:
+    """Parses a meter data file in a process pool.
+
+    The file is split into chunks byte ranges at line boundaries (default four per
+    worker). Every range is parsed in a worker and the columns are joined in file
+    order, so the store is the same as the one edit_data_types builds serially.
+    """
+    workers = workers or os.cpu_count() or 1
+    ranges = chunk_ranges(meter_datafile, chunks or workers * 4)
+    if progress is not None:
+        progress.start(os.path.getsize(meter_datafile))
+    meter_data = MeterStore()
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        starts = [start for start, _ in ranges]
+        stops = [stop for _, stop in ranges]
+        for (start, stop), columns in zip(ranges, executor.map(parse_range, [meter_datafile] * len(ranges), starts, stops)):
+            for name, column in meter_data.columns().items():
+                column.extend(columns[name])
+            if progress is not None:
+                progress.advance(stop - start)
+    return meter_data
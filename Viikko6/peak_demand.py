@@ -0,0 +1,150 @@
+# Copyright 2025 Niko Hätälä
+# License: MIT
+
+from array import array
+from collections import Counter, deque
+from datetime import date
+import heapq
+from meter_store import MeterStore
+from rollup_index import RollupIndex
+
+PEAK_WINDOW_HOURS = 3
+LOAD_BIN_WIDTH = 0.05
+ROLLING_PEAK_DAYS = 30
+MILLI = 1000
+
+def month_ranges(rollups: RollupIndex) -> list[tuple[date, int, int]]:
+    """Returns (first day of month, start row, stop row) of every month in the data."""
+    ranges = []
+    for position, ordinal in enumerate(rollups.days):
+        month = date.fromordinal(ordinal).replace(day=1)
+        if not ranges or ranges[-1][0] != month:
+            ranges.append([month, rollups.day_starts[position], 0])
+        ranges[-1][2] = rollups.day_starts[position + 1]
+    return [tuple(month_range) for month_range in ranges]
+
+def top_hours(store: MeterStore, start: int, stop: int, count: int) -> list[int]:
+    """Returns the rows of the count highest consumption hours between rows start..stop, highest first.
+
+    Uses a heap of count rows instead of sorting the range. Of equal hours the earlier comes first.
+    """
+    return heapq.nlargest(count, range(start, stop), key=store.consumption.__getitem__)
+
+def monthly_peak_hours(store: MeterStore, rollups: RollupIndex, count: int) -> list[tuple[date, list[int]]]:
+    """Returns (month, top_hours rows) of every month in the data."""
+    return [(month, top_hours(store, start, stop, count)) for month, start, stop in month_ranges(rollups)]
+
+def peak_window(store: MeterStore, start: int, stop: int, hours: int = PEAK_WINDOW_HOURS) -> tuple[int, float] | None:
+    """Returns (first row, average consumption) of the consecutive hours with the highest average between rows start..stop.
+
+    The window sum is moved one hour at a time. Returns None if the range is shorter than the window.
+    """
+    if stop - start < hours:
+        return None
+    consumption = store.consumption
+    window_sum = sum(memoryview(consumption)[start:start + hours])
+    best_sum, best_row = window_sum, start
+    for row in range(start + hours, stop):
+        window_sum += consumption[row] - consumption[row - hours]
+        if window_sum > best_sum:
+            best_sum, best_row = window_sum, row - hours + 1
+    return best_row, best_sum / hours
+
+def sliding_maximum(values, width: int) -> array:
+    """Returns the position of the largest value of every window of width values ending at each position.
+
+    The first width - 1 windows are shorter. A deque keeps the positions of the
+    values that can still become the maximum in decreasing order, so every value
+    is added and removed once.
+    """
+    candidates = deque()
+    positions = array("q")
+    for position, value in enumerate(values):
+        while candidates and values[candidates[-1]] <= value:
+            candidates.pop()
+        candidates.append(position)
+        if candidates[0] <= position - width:
+            candidates.popleft()
+        positions.append(candidates[0])
+    return positions
+
+def daily_peak_rows(store: MeterStore, rollups: RollupIndex) -> array:
+    """Returns the row of the highest consumption hour of every day."""
+    consumption = store.consumption.__getitem__
+    day_starts = rollups.day_starts
+    return array("q", (max(range(day_starts[day], day_starts[day + 1]), key=consumption) for day in range(len(rollups.days))))
+
+def rolling_peak_demand(store: MeterStore, rollups: RollupIndex, days: int = ROLLING_PEAK_DAYS) -> list[tuple[date, int]]:
+    """Returns (date, row) of the highest consumption hour during the days days ending on every day."""
+    peak_rows = daily_peak_rows(store, rollups)
+    peaks = sliding_maximum([store.consumption[row] for row in peak_rows], days)
+    return [(date.fromordinal(rollups.days[day]), peak_rows[peaks[day]]) for day in range(len(peaks))]
+
+class LoadDurationCurve:
+    """Histogram of hourly consumption for load duration curves.
+
+    Hours are counted in bins of bin_width kWh, so building the curve needs only
+    the sorted bins instead of every hour. The values are binned as whole
+    thousandths, the precision of the meter exports, so a value on a bin edge
+    always lands in the bin it starts. Curves of separate periods can be
+    merged, which lets a curve of any months be added up from monthly curves
+    without reading the hours again.
+    """
+    def __init__(self, bin_width: float = LOAD_BIN_WIDTH):
+        self.bin_width = bin_width
+        self.bin_milli = round(bin_width * MILLI)
+        self.counts = Counter()
+        self.hours = 0
+
+    def add(self, values) -> None:
+        """Adds hourly consumption values to the histogram."""
+        bin_milli = self.bin_milli
+        self.counts.update(round(value * MILLI) // bin_milli for value in values)
+        self.hours = self.counts.total()
+
+    def merge(self, other: "LoadDurationCurve") -> None:
+        if other.bin_milli != self.bin_milli:
+            raise ValueError("Kuormitusjakaumien luokkaleveydet eroavat.")
+        self.counts.update(other.counts)
+        self.hours += other.hours
+
+    def hours_above(self, load: float) -> int:
+        """Returns the number of hours with consumption at or above the bin of the given load."""
+        limit = round(load * MILLI) // self.bin_milli
+        return sum(count for load_bin, count in self.counts.items() if load_bin >= limit)
+
+    def curve(self) -> list[tuple[int, float]]:
+        """Returns (hours, load) points of the curve: the load is reached or exceeded during hours hours.
+
+        The load of a point is the lower edge of its bin, so it is exact to bin_width.
+        """
+        points = []
+        hours = 0
+        for load_bin in sorted(self.counts, reverse=True):
+            hours += self.counts[load_bin]
+            points.append((hours, load_bin * self.bin_milli / MILLI))
+        return points
+
+    def load_at(self, hours: int) -> float:
+        """Returns the load that is reached or exceeded during the given number of hours."""
+        for point_hours, load in self.curve():
+            if point_hours >= hours:
+                return load
+        return 0.0
+
+def monthly_load_curves(store: MeterStore, rollups: RollupIndex, bin_width: float = LOAD_BIN_WIDTH) -> dict[date, LoadDurationCurve]:
+    """Returns the load duration curve of every month in the data."""
+    consumption = memoryview(store.consumption)
+    curves = {}
+    for month, start, stop in month_ranges(rollups):
+        curves[month] = LoadDurationCurve(bin_width)
+        curves[month].add(consumption[start:stop])
+    return curves
+
+def combined_load_curve(curves: dict[date, LoadDurationCurve], start_month: date, end_month: date, bin_width: float = LOAD_BIN_WIDTH) -> LoadDurationCurve:
+    """Merges the monthly curves from start_month to end_month (inclusive) into one curve."""
+    combined = LoadDurationCurve(bin_width)
+    for month, curve in curves.items():
+        if start_month <= month <= end_month:
+            combined.merge(curve)
+    return combined
@@ -2,35 +2,97 @@
 # License: MIT
 
 from calendar import month
-from datetime import date, datetime, time, timezone
+import argparse
+from datetime import date, datetime, time, timedelta, timezone
 import sys
 from typing import List, Dict
 from pathlib import Path
+from background_task import BackgroundTask, Progress, tracked_lines
+from cost_engine import MeterCosts, PriceSeries, TimeOfUseTariff
+from meter_cache import load_cached_columns, save_cached_columns
+from meter_store import MeterStore
+from peak_demand import ROLLING_PEAK_DAYS, combined_load_curve, month_ranges, monthly_load_curves, peak_window, rolling_peak_demand, top_hours
+from rollup_index import RollupIndex
+from streaming_summary import stream_daily_summary, stream_monthly_summary
+from temperature_regression import TemperatureRegression, regression_state_path
+from timestamp_parser import HourlyTimestampParser
 
-def edit_data_types(meter_data: list) -> list:
-    """Edits the types of the meter data"""
-    meter_data_edited = []
+def edit_data_types(meter_data) -> MeterStore:
+    """Edits the types of the meter data and stores the rows in a columnar MeterStore."""
+    meter_data_edited = MeterStore()
+    timestamp_parser = HourlyTimestampParser()
     for data in meter_data:
-        date_time = datetime.fromisoformat(data[0])
+        timestamp, utc_offset = timestamp_parser.parse_epoch(data[0])
         consumption = float(data[1].replace(",", "."))
         production = float(data[2].replace(",", "."))
         average_temperature = float(data[3].replace(",", "."))
-        meter_data_edited.append([date_time, consumption, production, average_temperature])
+        meter_data_edited.append_epoch(timestamp, utc_offset, consumption, production, average_temperature)
     return meter_data_edited
 
-def read_meter_data(meter_datafile: str) -> list:
-    """Reads meter data, changes types and returns a new list with edited types."""
-    meter_data = []
-    with open(meter_datafile, "r", encoding="utf-8") as file:
-        for line in file:
-            line = line.strip().split(";")
-            if line[0] == "Aika":
-                continue
-            else:
-                meter_data.append(line)
-    meter_data = edit_data_types(meter_data)
+def read_meter_data(meter_datafile: str, use_cache: bool = True, rebuild_cache: bool = False, progress: Progress = None, workers: int = 1, save_cache: bool = True) -> MeterStore:
+    """Reads meter data, changes types and returns a MeterStore with edited types.
+
+    The parsed columns are cached next to the data file and loaded from there
+    while the data file stays unchanged. With save_cache False an existing cache
+    is used but no cache file is written. With more than one worker the file is
+    parsed in parts in a process pool.
+    """
+    if use_cache and not rebuild_cache:
+        columns = load_cached_columns(meter_datafile)
+        if columns is not None:
+            return MeterStore.from_columns(columns)
+    if workers > 1:
+        from parallel_parser import parallel_read_meter_data
+        meter_data = parallel_read_meter_data(meter_datafile, workers, progress=progress)
+    else:
+        with open(meter_datafile, "r", encoding="utf-8") as file:
+            lines = (line.strip().split(";") for line in tracked_lines(file, progress))
+            meter_data = edit_data_types(line for line in lines if line[0] != "Aika")
+    if use_cache and save_cache:
+        save_cached_columns(meter_datafile, meter_data.columns())
     return meter_data
 
+def load_meter_data(meter_datafile: str, use_cache: bool = True, rebuild_cache: bool = False, workers: int = 1, progress: Progress = None) -> tuple[MeterStore, RollupIndex]:
+    """Reads the meter data and builds its rollup index."""
+    meter_data = read_meter_data(meter_datafile, use_cache, rebuild_cache, progress, workers)
+    return meter_data, RollupIndex(meter_data)
+
+def load_meter_costs(meter_data: MeterStore, rollups: RollupIndex, args: argparse.Namespace) -> MeterCosts:
+    """Joins the meter data with the hourly prices and tariffs given on the command line."""
+    tariff = TimeOfUseTariff(args.day_tariff, args.night_tariff)
+    return MeterCosts(meter_data, rollups, PriceSeries.from_csv(args.prices), tariff, args.margin, args.sale_margin)
+
+def read_arguments() -> argparse.Namespace:
+    """Reads the command line arguments."""
+    parser = argparse.ArgumentParser(description="Sähkönkulutuksen ja -tuotannon raportointiohjelma.")
+    parser.add_argument("--no-cache", action="store_true", help="Lue datatiedosto ilman välimuistia")
+    parser.add_argument("--rebuild-cache", action="store_true", help="Rakenna välimuisti uudelleen datatiedostosta")
+    parser.add_argument("--stream", action="store_true", help="Laske yhteenvedot lukemalla datatiedosto kerran jokaista raporttia varten lataamatta sitä muistiin")
+    parser.add_argument("--prices", metavar="HINTATIEDOSTO", help="Laske kustannukset tuntihinnoista (CSV: Aika;Hinta snt/kWh)")
+    parser.add_argument("--margin", type=float, default=0.0, help="Sähköenergian marginaali snt/kWh --prices-valinnalla (oletus: 0)")
+    parser.add_argument("--sale-margin", type=float, default=0.0, help="Tuotannon myynnin marginaali snt/kWh --prices-valinnalla (oletus: 0)")
+    parser.add_argument("--day-tariff", type=float, default=0.0, help="Päiväsiirron hinta klo 7-22 snt/kWh --prices-valinnalla (oletus: 0)")
+    parser.add_argument("--night-tariff", type=float, default=0.0, help="Yösiirron hinta klo 22-7 snt/kWh --prices-valinnalla (oletus: 0)")
+    parser.add_argument("--sites", metavar="HAKEMISTO", help="Tee yhteisraportti kaikista hakemiston kohteiden CSV-tiedostoista ilman valikkoa ja lopeta")
+    parser.add_argument("--sites-save-cache", action="store_true", help="Tallenna kohteiden välimuistitiedostot datatiedostojen viereen --sites-valinnalla (oletus: hakemistoon ei kirjoiteta)")
+    parser.add_argument("--sites-report", default="kohderaportti.txt", help="Yhteisraportin tiedosto --sites-valinnalla (oletus: kohderaportti.txt)")
+    parser.add_argument("--workers", type=int, default=None, help="Rinnakkaisten prosessien määrä datatiedoston jäsentämisessä (oletus: 1) ja --sites-valinnalla (oletus: prosessoriytimien määrä)")
+    parser.add_argument("--weather", action="store_true", help="Tulosta lämpötilamallin kertoimet, säänormalisoitu kulutus ja poikkeavat päivät ilman valikkoa ja lopeta")
+    parser.add_argument("--normal-degree-days", type=float, metavar="ASTEPÄIVÄT", help="Normaalivuoden lämmitysastepäivät datan aikavälille --weather-valinnalla; ilman tätä säänormalisoitua kulutusta ei lasketa")
+    parser.add_argument("--peaks", type=int, metavar="N", help="Tulosta kuukausien N suurinta kulutustuntia, huipputeho ja kuormitusjakauma ilman valikkoa ja lopeta")
+    parser.add_argument("--peak-hours", type=int, default=3, help="Huipputehon liukuvan keskiarvon pituus tunteina --peaks-valinnalla (oletus: 3)")
+    parser.add_argument("--chunksize", type=int, default=1, help="Kerralla prosessille annettavien tiedostojen määrä --sites-valinnalla (oletus: 1)")
+    args = parser.parse_args()
+    if args.peaks is not None and args.peaks < 1:
+        parser.error("--peaks: tuntien määrän on oltava vähintään 1")
+    if args.peak_hours < 1:
+        parser.error("--peak-hours: keskiarvon pituuden on oltava vähintään 1 tunti")
+    if args.workers is not None and args.workers < 1:
+        parser.error("--workers: prosessien määrän on oltava vähintään 1")
+    if args.chunksize < 1:
+        parser.error("--chunksize: tiedostojen määrän on oltava vähintään 1")
+    return args
+
 def finnish_day_name(english_day_name: str) -> str:
     """Converts English day names to Finnish."""
     days = {
@@ -111,36 +173,90 @@ def secondary_menu():
     print("2 - Luo uusi raportti")
     print("3 - Lopeta")
 
-def daily_summary(meter_data: list, start_date: date, end_date: date) -> list[float, float, float, float, tuple, tuple, date, date]:
-    """Generates a daily summary report for the given date range."""
-    net_consumption = 0.0
-    net_production = 0.0
-    average_temperature = 0.0
-    net_load = 0.0
-    date_time = meter_data[0][0].date()
+def daily_summary(meter_data: MeterStore, start_date: date, end_date: date, rollups: RollupIndex = None) -> list[float, float, float, float, tuple, tuple, date, date]:
+    """Generates a daily summary report for the given date range using the rollup index built at load time."""
+    if rollups is None:
+        rollups = RollupIndex(meter_data)
+    date_time = meter_data.first_date()
     highest_consumption = (date_time, 0.0, 0,0)
     lowest_consumption = (date_time, 9999999.0, 0.0)
     if start_date < date_time:
             start_date = date_time
             print(f"\nDatatiedoston alkupäivä: {finnish_date(start_date)}. Raportti aloitetaan tästä päivästä.")
-    if end_date > meter_data[-1][0].date():
-            end_date = meter_data[-1][0].date()
+    if end_date > meter_data.last_date():
+            end_date = meter_data.last_date()
             print(f"\nDatatiedoston viimeinen päivä: {finnish_date(end_date)}. Raportti lopetetaan tähän päivään.")
-    for line in meter_data:
-        if line[0].date() >= start_date and line[0].date() <= end_date:
-            net_consumption += line[1]
-            net_production += line[2]
-            average_temperature += line[3]
-            net_load += line[2] - line[1]
-            if line[1] > highest_consumption[1]:
-                highest_consumption = (line[0], line[1], line[3])
-            if line[1] < lowest_consumption[1]:
-                lowest_consumption = (line[0], line[1], line[3])
-        else:
-            continue
-    average_temperature = average_temperature / ((end_date - start_date).days + 1)
+    summary = rollups.range_summary(start_date, end_date)
+    net_consumption, net_production, average_temperature, net_load, rows = summary[:5]
+    if summary[5] is not None and meter_data.consumption[summary[5]] > highest_consumption[1]:
+        highest_consumption = meter_data.hour_at(summary[5])
+    if summary[6] is not None and meter_data.consumption[summary[6]] < lowest_consumption[1]:
+        lowest_consumption = meter_data.hour_at(summary[6])
+    average_temperature = average_temperature / rows if rows else 0.0
     return [net_consumption, net_production, average_temperature, net_load, highest_consumption, lowest_consumption, start_date, end_date]
 
+def print_cost_summary(costs: list):
+    """Print the costs of a summary period to the console."""
+    print("Sähköenergia: ", round(costs[0], 2), " €")
+    print("Siirto: ", round(costs[1], 2), " €")
+    print("Tuotannon hyvitys: ", round(costs[2], 2), " €")
+    print("Nettokustannus: ", round(costs[3], 2), " €")
+
+def print_weather_report(meter_datafile: str, rollups: RollupIndex, normal_degree_days: float = None):
+    """Update the saved temperature regression of the data file and print the weather report to the console.
+
+    The weather-normalized consumption is printed only when the normal degree days of the period are given.
+    """
+    state_file = regression_state_path(meter_datafile)
+    regression = TemperatureRegression.load(state_file)
+    added_days = regression.update(rollups)
+    regression.save(state_file)
+    base_load, per_degree_day = regression.model.coefficients()
+    first_date = date.fromordinal(rollups.days[0])
+    last_date = date.fromordinal(rollups.days[-1])
+    consumption, normalized, degree_days = regression.normalized_consumption(rollups, first_date, last_date, normal_degree_days or 0.0)
+    print(f"\n\nLämpötilamalli aikaväliltä {finnish_date(first_date)} - {finnish_date(last_date)}:")
+    print("-----------------------------------------")
+    print("Mallissa päiviä: ", regression.model.days, " (uusia ", added_days, ")")
+    print("Peruskulutus: ", round(base_load, 2), " kWh/vrk")
+    print("Lämmityskerroin: ", round(per_degree_day, 2), " kWh/astepäivä")
+    print("Keskihajonta: ", round(regression.model.residual_deviation(), 2), " kWh/vrk")
+    print("Astepäivät: ", round(degree_days, 1))
+    print("Kokonaiskulutus: ", round(consumption, 2), " kWh")
+    if normal_degree_days is not None:
+        print("Normaalivuoden astepäivät: ", round(normal_degree_days, 1))
+        print("Säänormalisoitu kulutus: ", round(normalized, 2), " kWh")
+    anomalies = regression.anomalies(rollups)
+    print("\nPoikkeavat päivät:" if anomalies else "\nEi poikkeavia päiviä.")
+    for day, day_consumption, expected, mean_temperature in anomalies:
+        print(finnish_date(day), ": ", round(day_consumption, 2), " kWh (odotettu ", round(expected, 2), " kWh) / keskilämpötila:", round(mean_temperature, 2), " °C")
+
+def print_peak_report(meter_data: MeterStore, rollups: RollupIndex, count: int, window_hours: int):
+    """Print the peak hours and the highest moving average of every month and the load duration curve to the console."""
+    months = month_ranges(rollups)
+    rolling_peaks = dict(rolling_peak_demand(meter_data, rollups))
+    for month, start, stop in months:
+        print(f"\n\nHuipputunnit {finnish_month(month.month)} {month.year}:")
+        print("-----------------------------------------")
+        for row in top_hours(meter_data, start, stop, count):
+            hour = meter_data.hour_at(row)
+            print(finnish_date(hour[0]), hour[0].strftime("%H:%M"), ": ", round(hour[1], 2), " kWh / lämpötila:", round(hour[2], 2), " °C")
+        window = peak_window(meter_data, start, stop, window_hours)
+        if window is not None:
+            window_start = meter_data.datetime_at(window[0])
+            print(f"Suurin {window_hours} tunnin keskiteho: ", round(window[1], 2), " kW / alkaen", finnish_date(window_start), window_start.strftime("%H:%M"))
+        last_day = meter_data.date_at(stop - 1)
+        rolling_peak = meter_data.hour_at(rolling_peaks[last_day])
+        print(f"Suurin tunti {ROLLING_PEAK_DAYS} vrk ajalta {finnish_date(last_day)} asti: ", round(rolling_peak[1], 2), " kWh /", finnish_date(rolling_peak[0]), rolling_peak[0].strftime("%H:%M"))
+    if not months:
+        return
+    curve = combined_load_curve(monthly_load_curves(meter_data, rollups), months[0][0], months[-1][0])
+    print("\n\nKuormitusjakauma:")
+    print("-----------------------------------------")
+    for share in (1, 5, 10, 25, 50, 75, 100):
+        hours = max(1, curve.hours * share // 100)
+        print(f"{share} % tunneista ({hours} h): vähintään ", round(curve.load_at(hours), 2), " kWh")
+
 def print_daily_summary(summary: list):
     """Print daily summary to the console."""
     print(f"\n\nRaportti aikaväliltä {finnish_date(summary[6])} - {finnish_date(summary[7])}:")
@@ -177,28 +293,26 @@ def write_daily_summary(summary: list):
             report_file.write(f"Matalin kulutus: {round(summary[5][1], 2)} kWh / {finnish_date(summary[5][0])} / keskilämpötila: {round(summary[5][2], 2)} °C\n")
     print("\nRaportti kirjoitettu tiedostoon raportti.txt")
 
-def monthly_summary(meter_data: list, month: int ) -> list[float, float, float, float, tuple, tuple]:
-    """Generates a monthly summary report for the given month."""
-    net_consumption = 0.0
-    net_production = 0.0
-    average_temperature = 0.0
-    net_load = 0.0
-    date_time = meter_data[0][0].date()
+def monthly_summary(meter_data: MeterStore, month: int, rollups: RollupIndex = None) -> list[float, float, float, float, tuple, tuple]:
+    """Generates a monthly summary report for the given month using the rollup index built at load time."""
+    if rollups is None:
+        rollups = RollupIndex(meter_data)
+    date_time = meter_data.first_date()
     highest_consumption = (date_time, 0.0, 0,0)
     lowest_consumption = (date_time, 9999999.0, 0.0)
-    for line in meter_data:
-        if line[0].month != month:
-            continue
-        else:
-            net_consumption += line[1]
-            net_production += line[2]
-            average_temperature += line[3]
-            net_load += line[2] - line[1]
-            if line[1] > highest_consumption[1]:
-                highest_consumption = (line[0], line[1], line[3])
-            if line[1] < lowest_consumption[1]:
-                lowest_consumption = (line[0], line[1], line[3])
-    average_temperature = average_temperature / sum(1 for line in meter_data if line[0].month == month)
+    month_ranges = []
+    if len(meter_data) > 0:
+        for year in range(meter_data.first_date().year, meter_data.last_date().year + 1):
+            month_start = date(year, month, 1)
+            month_end = date(year, 12, 31) if month == 12 else date(year, month + 1, 1) - timedelta(days=1)
+            month_ranges.append((month_start, month_end))
+    summary = rollups.ranges_summary(month_ranges)
+    net_consumption, net_production, average_temperature, net_load, rows = summary[:5]
+    if summary[5] is not None and meter_data.consumption[summary[5]] > highest_consumption[1]:
+        highest_consumption = meter_data.hour_at(summary[5])
+    if summary[6] is not None and meter_data.consumption[summary[6]] < lowest_consumption[1]:
+        lowest_consumption = meter_data.hour_at(summary[6])
+    average_temperature = average_temperature / rows if rows else 0.0
     return [net_consumption, net_production, average_temperature, net_load, highest_consumption, lowest_consumption]
 
 def print_monthly_summary(summary: list, month: int):
@@ -275,7 +389,26 @@ def write_yearly_summary(summary: list):
 
 def main():
     """Main function to run the report maker program."""
-    meter_data = read_meter_data("2025.csv")
+    args = read_arguments()
+    if args.sites:
+        from fleet_report import write_fleet_report
+        sites = write_fleet_report(args.sites, args.sites_report, args.workers, args.chunksize, not args.no_cache, args.sites_save_cache)
+        print(f"\nYhteisraportti {sites} kohteesta kirjoitettu tiedostoon {args.sites_report}")
+        return
+    meter_datafile = "2025.csv"
+    if args.weather:
+        _, rollups = load_meter_data(meter_datafile, not args.no_cache, args.rebuild_cache, args.workers or 1)
+        print_weather_report(meter_datafile, rollups, args.normal_degree_days)
+        return
+    if args.peaks is not None:
+        meter_data, rollups = load_meter_data(meter_datafile, not args.no_cache, args.rebuild_cache, args.workers or 1)
+        print_peak_report(meter_data, rollups, args.peaks, args.peak_hours)
+        return
+    costs = None
+    if args.stream and args.prices:
+        print("\nKustannuksia ei lasketa --stream-valinnalla.")
+    if not args.stream:
+        loading = BackgroundTask(load_meter_data, meter_datafile, not args.no_cache, args.rebuild_cache, args.workers or 1)
     while True:
         main_menu()
         """Main program loop."""
@@ -294,8 +427,15 @@ def main():
             else:
                 start_date = datetime.strptime(input_start_date, "%d.%m.%Y").date()
                 end_date = datetime.strptime(input_end_date, "%d.%m.%Y").date()
-                summary = daily_summary(meter_data, start_date, end_date)
+                if args.stream:
+                    summary = BackgroundTask(stream_daily_summary, meter_datafile, start_date, end_date).result("Lasketaan raporttia")
+                else:
+                    meter_data, rollups = loading.result("Ladataan mittausdataa")
+                    summary = daily_summary(meter_data, start_date, end_date, rollups)
                 print_daily_summary(summary)
+                if args.prices and not args.stream:
+                    costs = costs or load_meter_costs(meter_data, rollups, args)
+                    print_cost_summary(costs.range_costs(summary[6], summary[7]))
             secondary_menu()
             """Secondary options loop."""
             while True:
@@ -320,8 +460,15 @@ def main():
                 continue
             else:
                 month = int(input_month)
-                summary = monthly_summary(meter_data, month)
+                if args.stream:
+                    summary = BackgroundTask(stream_monthly_summary, meter_datafile, month).result("Lasketaan raporttia")
+                else:
+                    meter_data, rollups = loading.result("Ladataan mittausdataa")
+                    summary = monthly_summary(meter_data, month, rollups)
                 print_monthly_summary(summary, month)
+                if args.prices and not args.stream:
+                    costs = costs or load_meter_costs(meter_data, rollups, args)
+                    print_cost_summary(costs.month_costs(month))
             secondary_menu()
             """Secondary options loop."""
             while True:
@@ -342,8 +489,15 @@ def main():
             print("\nVuoden 2025 kokonaisyhteenveto valittu.\n")
             start_date = datetime.strptime("01.01.2025", "%d.%m.%Y").date()
             end_date = datetime.strptime("31.12.2025", "%d.%m.%Y").date()
-            summary = daily_summary(meter_data, start_date, end_date)
+            if args.stream:
+                summary = BackgroundTask(stream_daily_summary, meter_datafile, start_date, end_date).result("Lasketaan raporttia")
+            else:
+                meter_data, rollups = loading.result("Ladataan mittausdataa")
+                summary = daily_summary(meter_data, start_date, end_date, rollups)
             print_yearly_summary(summary)
+            if args.prices and not args.stream:
+                costs = costs or load_meter_costs(meter_data, rollups, args)
+                print_cost_summary(costs.range_costs(summary[6], summary[7]))
             secondary_menu()
             """Secondary options loop."""
             while True:
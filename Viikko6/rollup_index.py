@@ -0,0 +1,142 @@
+# Copyright 2025 Niko Hätälä
+# License: MIT
+
+from array import array
+from datetime import date
+import operator
+from meter_store import MILLI, MeterStore, to_milli
+
+class RollupIndex:
+    """Per-day rollups of a MeterStore for constant time range summaries.
+
+    The index keeps prefix sums of the daily consumption, production, temperature
+    and net load, the first row of every day and sparse tables of the rows with
+    the highest and lowest consumption. Any start_date..end_date query is answered
+    without touching the hourly rows. Build a new index if the store changes.
+
+    The meter values have three decimals, so the prefix sums are kept as exact
+    integers in thousandths and the totals are the exact decimal sums. A plain
+    float loop over the rows drifts in the last bits and can print a different
+    last digit, e.g. a net load of -1357.845 that the loop summed to
+    -1357.8449999999991.
+    """
+    def __init__(self, store: MeterStore):
+        self.store = store
+        self.days = array("l")
+        self.day_starts = array("q")
+        previous_day = None
+        for index in range(len(store)):
+            day = store.day_ordinal_at(index)
+            if day != previous_day:
+                self.days.append(day)
+                self.day_starts.append(index)
+                previous_day = day
+        self.day_starts.append(len(store))
+        self._build_prefix_sums()
+        self._build_day_positions()
+        self.highest_table = self._build_sparse_table(max, operator.ge)
+        self.lowest_table = self._build_sparse_table(min, operator.le)
+
+    def _build_prefix_sums(self) -> None:
+        """Sums every day in thousandths and stores the running totals."""
+        consumption = array("q", map(to_milli, self.store.consumption))
+        production = array("q", map(to_milli, self.store.production))
+        temperature = array("q", map(to_milli, self.store.temperature))
+        self.consumption_sums = array("q", [0])
+        self.production_sums = array("q", [0])
+        self.temperature_sums = array("q", [0])
+        self.net_load_sums = array("q", [0])
+        for day in range(len(self.days)):
+            start, stop = self.day_starts[day], self.day_starts[day + 1]
+            day_consumption = sum(consumption[start:stop])
+            day_production = sum(production[start:stop])
+            self.consumption_sums.append(self.consumption_sums[-1] + day_consumption)
+            self.production_sums.append(self.production_sums[-1] + day_production)
+            self.temperature_sums.append(self.temperature_sums[-1] + sum(temperature[start:stop]))
+            self.net_load_sums.append(self.net_load_sums[-1] + day_production - day_consumption)
+
+    def _build_day_positions(self) -> None:
+        """Maps every calendar day between the first and last day to its position in days."""
+        self.day_positions = array("q")
+        if len(self.days) == 0:
+            return
+        position = 0
+        for day in range(self.days[0], self.days[-1] + 2):
+            while position < len(self.days) and self.days[position] < day:
+                position += 1
+            self.day_positions.append(position)
+
+    def _build_sparse_table(self, pick, better) -> list[array]:
+        """Builds a sparse table of row indexes for the best consumption over 2^k days."""
+        consumption = self.store.consumption
+        level = array("q")
+        for day in range(len(self.days)):
+            start, stop = self.day_starts[day], self.day_starts[day + 1]
+            level.append(start + operator.indexOf(consumption[start:stop], pick(consumption[start:stop])))
+        table = [level]
+        width = 1
+        while width * 2 <= len(self.days):
+            previous = table[-1]
+            level = array("q")
+            for day in range(len(self.days) - width * 2 + 1):
+                left, right = previous[day], previous[day + width]
+                level.append(left if better(consumption[left], consumption[right]) else right)
+            table.append(level)
+            width *= 2
+        return table
+
+    def day_range(self, start_date: date, end_date: date) -> tuple[int, int]:
+        """Returns the day positions start..stop covering the given date range."""
+        if len(self.days) == 0:
+            return 0, 0
+        last = len(self.day_positions) - 1
+        start = min(max(start_date.toordinal() - self.days[0], 0), last)
+        stop = min(max(end_date.toordinal() + 1 - self.days[0], 0), last)
+        return self.day_positions[start], max(self.day_positions[start], self.day_positions[stop])
+
+    def _best_row(self, table: list[array], better, start: int, stop: int) -> int:
+        """Returns the row index of the best consumption between day positions start..stop."""
+        level = (stop - start).bit_length() - 1
+        left = table[level][start]
+        right = table[level][stop - (1 << level)]
+        consumption = self.store.consumption
+        return left if better(consumption[left], consumption[right]) else right
+
+    def _milli_totals(self, start: int, stop: int) -> list[int]:
+        """Returns [consumption, production, temperature sum, net load] in thousandths of day positions start..stop."""
+        return [sums[stop] - sums[start] for sums in (self.consumption_sums, self.production_sums, self.temperature_sums, self.net_load_sums)]
+
+    def position_totals(self, start: int, stop: int) -> list:
+        """Returns [consumption, production, temperature sum, net load, rows] of day positions start..stop."""
+        return [total / MILLI for total in self._milli_totals(start, stop)] + [self.day_starts[stop] - self.day_starts[start]]
+
+    def ranges_summary(self, date_ranges: list[tuple[date, date]]) -> list:
+        """Summarizes the days of chronological, non-overlapping start_date..end_date ranges (inclusive).
+
+        Returns [consumption, production, temperature sum, net load, rows,
+        highest consumption row, lowest consumption row]. Of equal hours the
+        earliest is returned. The row indexes are None when there is no data in
+        the ranges.
+        """
+        consumption = self.store.consumption
+        totals = [0, 0, 0, 0]
+        rows = 0
+        highest_row = None
+        lowest_row = None
+        for start_date, end_date in date_ranges:
+            start, stop = self.day_range(start_date, end_date)
+            if stop == start:
+                continue
+            totals = list(map(operator.add, totals, self._milli_totals(start, stop)))
+            rows += self.day_starts[stop] - self.day_starts[start]
+            highest = self._best_row(self.highest_table, operator.ge, start, stop)
+            lowest = self._best_row(self.lowest_table, operator.le, start, stop)
+            if highest_row is None or consumption[highest] > consumption[highest_row]:
+                highest_row = highest
+            if lowest_row is None or consumption[lowest] < consumption[lowest_row]:
+                lowest_row = lowest
+        return [total / MILLI for total in totals] + [rows, highest_row, lowest_row]
+
+    def range_summary(self, start_date: date, end_date: date) -> list:
+        """Summarizes the days between start_date and end_date (inclusive) like ranges_summary."""
+        return self.ranges_summary([(start_date, end_date)])
@@ -0,0 +1,159 @@
+# Copyright 2025 Niko Hätälä
+# License: MIT
+
+from datetime import date, datetime, timedelta, timezone
+import operator
+from background_task import Progress, tracked_lines
+from meter_store import EPOCH_ORDINAL, MILLI, SECONDS_PER_DAY, to_milli
+from timestamp_parser import HourlyTimestampParser
+
+def read_lines(meter_datafile: str, progress: Progress = None):
+    """Yields the data lines of a meter data file split into fields."""
+    with open(meter_datafile, "r", encoding="utf-8") as file:
+        for line in tracked_lines(file, progress):
+            fields = line.strip().split(";")
+            if fields[0] != "Aika":
+                yield fields
+
+def decode_rows(lines):
+    """Yields rows as (timestamp, utc_offset, day ordinal, consumption, production, temperature)."""
+    timestamp_parser = HourlyTimestampParser()
+    for fields in lines:
+        timestamp, utc_offset = timestamp_parser.parse_epoch(fields[0])
+        yield (
+            timestamp,
+            utc_offset,
+            (timestamp + utc_offset) // SECONDS_PER_DAY + EPOCH_ORDINAL,
+            float(fields[1].replace(",", ".")),
+            float(fields[2].replace(",", ".")),
+            float(fields[3].replace(",", "."))
+        )
+
+def filter_days(rows, start_date: date, end_date: date):
+    """Yields the rows between start_date and end_date (inclusive).
+
+    The rows are chronological, so reading stops at the first row after end_date.
+    """
+    first_day = start_date.toordinal()
+    last_day = end_date.toordinal()
+    for row in rows:
+        if row[2] > last_day:
+            break
+        if row[2] >= first_day:
+            yield row
+
+def filter_month(rows, month: int):
+    """Yields the rows of the given month number in any year."""
+    current_day = None
+    current_month = None
+    for row in rows:
+        if row[2] != current_day:
+            current_day = row[2]
+            current_month = date.fromordinal(current_day).month
+        if current_month == month:
+            yield row
+
+class DaySpan:
+    """Records the first and last day of the rows passing through it."""
+    def __init__(self):
+        self.first_day = None
+        self.last_day = None
+
+    def observe(self, rows):
+        for row in rows:
+            if self.first_day is None:
+                self.first_day = row[2]
+            self.last_day = row[2]
+            yield row
+
+class RunningSum:
+    """Online exact sum and row count of meter values, kept in thousandths like the rollup index."""
+    def __init__(self):
+        self.milli = 0
+        self.count = 0
+
+    def add(self, value: float) -> None:
+        self.add_milli(to_milli(value))
+
+    def add_milli(self, value: int) -> None:
+        self.milli += value
+        self.count += 1
+
+    @property
+    def total(self) -> float:
+        return self.milli / MILLI
+
+    def mean(self) -> float:
+        return self.total / self.count if self.count else 0.0
+
+class RunningExtreme:
+    """Keeps the first row whose value beats every earlier one, like argmax/argmin."""
+    def __init__(self, better, initial: float):
+        self.better = better
+        self.value = initial
+        self.row = None
+
+    def add(self, value: float, row: tuple) -> None:
+        if self.better(value, self.value):
+            self.value = value
+            self.row = row
+
+    def hour(self, placeholder: tuple) -> tuple:
+        """Returns (datetime, consumption, temperature) of the kept row, or the placeholder."""
+        if self.row is None:
+            return placeholder
+        offset = timezone(timedelta(seconds=self.row[1]))
+        return (datetime.fromtimestamp(self.row[0], offset), self.value, self.row[5])
+
+def summarize(rows) -> list:
+    """Aggregates the rows in one pass.
+
+    Returns [consumption, production, temperature, net load, highest, lowest] as
+    running aggregators.
+    """
+    consumption = RunningSum()
+    production = RunningSum()
+    temperature = RunningSum()
+    net_load = RunningSum()
+    highest = RunningExtreme(operator.gt, 0.0)
+    lowest = RunningExtreme(operator.lt, 9999999.0)
+    for row in rows:
+        row_consumption = to_milli(row[3])
+        row_production = to_milli(row[4])
+        consumption.add_milli(row_consumption)
+        production.add_milli(row_production)
+        temperature.add(row[5])
+        net_load.add_milli(row_production - row_consumption)
+        highest.add(row[3], row)
+        lowest.add(row[3], row)
+    return [consumption, production, temperature, net_load, highest, lowest]
+
+def stream_daily_summary(meter_datafile: str, start_date: date, end_date: date, progress: Progress = None) -> list[float, float, float, float, tuple, tuple, date, date]:
+    """Calculates daily_summary for the given date range while reading the file once."""
+    span = DaySpan()
+    totals = summarize(filter_days(span.observe(decode_rows(read_lines(meter_datafile, progress))), start_date, end_date))
+    if span.first_day is None:
+        raise ValueError(f"Datatiedostossa {meter_datafile} ei ole rivejä.")
+    first_date = date.fromordinal(span.first_day)
+    last_date = date.fromordinal(span.last_day)
+    if start_date < first_date:
+        start_date = first_date
+        print(f"\nDatatiedoston alkupäivä: {start_date.strftime('%d.%m.%Y')}. Raportti aloitetaan tästä päivästä.")
+    if end_date > last_date:
+        end_date = last_date
+        print(f"\nDatatiedoston viimeinen päivä: {end_date.strftime('%d.%m.%Y')}. Raportti lopetetaan tähän päivään.")
+    average_temperature = totals[2].mean()
+    highest_consumption = totals[4].hour((first_date, 0.0, 0,0))
+    lowest_consumption = totals[5].hour((first_date, 9999999.0, 0.0))
+    return [totals[0].total, totals[1].total, average_temperature, totals[3].total, highest_consumption, lowest_consumption, start_date, end_date]
+
+def stream_monthly_summary(meter_datafile: str, month: int, progress: Progress = None) -> list[float, float, float, float, tuple, tuple]:
+    """Calculates monthly_summary for the given month while reading the file once."""
+    span = DaySpan()
+    totals = summarize(filter_month(span.observe(decode_rows(read_lines(meter_datafile, progress))), month))
+    if span.first_day is None:
+        raise ValueError(f"Datatiedostossa {meter_datafile} ei ole rivejä.")
+    first_date = date.fromordinal(span.first_day)
+    highest_consumption = totals[4].hour((first_date, 0.0, 0,0))
+    lowest_consumption = totals[5].hour((first_date, 9999999.0, 0.0))
+    return [totals[0].total, totals[1].total, totals[2].mean(), totals[3].total, highest_consumption, lowest_consumption]
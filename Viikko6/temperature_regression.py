@@ -0,0 +1,179 @@
+# Copyright 2025 Niko Hätälä
+# License: MIT
+
+from bisect import bisect_right
+from datetime import date
+import hashlib
+import json
+import math
+import operator
+from pathlib import Path
+from rollup_index import RollupIndex
+
+HEATING_BASE_TEMPERATURE = 17.0
+ANOMALY_LIMIT = 3.0
+MINIMUM_DAY_ROWS = 23
+STATE_VERSION = 2
+
+def heating_degree_days(mean_temperature: float, base_temperature: float = HEATING_BASE_TEMPERATURE) -> float:
+    """Returns the heating degree days of a day with the given mean temperature."""
+    return max(0.0, base_temperature - mean_temperature)
+
+def daily_rollups(rollups: RollupIndex) -> list[list]:
+    """Returns [date ordinal, rows, consumption, mean temperature] of every day with a full day of rows.
+
+    Days with fewer than 23 hourly rows, such as the still open last day of an
+    export, are left out. 23 rows still allows the day daylight saving time starts.
+    """
+    days = []
+    for position, ordinal in enumerate(rollups.days):
+        consumption, _, temperature, _, rows = rollups.position_totals(position, position + 1)
+        if rows < MINIMUM_DAY_ROWS:
+            continue
+        days.append([ordinal, rows, consumption, temperature / rows])
+    return days
+
+def days_fingerprint(days: list[list]) -> str:
+    """Returns a SHA-256 hex digest of the daily rollups, to notice changed or removed days."""
+    return hashlib.sha256(repr(days).encode("ascii")).hexdigest()
+
+class DegreeDayModel:
+    """Least squares fit of daily consumption = base load + heating coefficient * heating degree days.
+
+    Only the running sums of the normal equations are kept, so days can be added
+    in batches at any time and the fit is solved again in constant time.
+    """
+    def __init__(self):
+        self.days = 0
+        self.sum_x = 0.0
+        self.sum_y = 0.0
+        self.sum_xx = 0.0
+        self.sum_xy = 0.0
+        self.sum_yy = 0.0
+
+    def add_days(self, degree_days: list[float], consumption: list[float]) -> None:
+        """Adds a batch of days given as parallel lists."""
+        self.days += len(degree_days)
+        self.sum_x += sum(degree_days)
+        self.sum_y += sum(consumption)
+        self.sum_xx += sum(map(operator.mul, degree_days, degree_days))
+        self.sum_xy += sum(map(operator.mul, degree_days, consumption))
+        self.sum_yy += sum(map(operator.mul, consumption, consumption))
+
+    def coefficients(self) -> tuple[float, float]:
+        """Returns (base load kWh/day, heating coefficient kWh per degree day)."""
+        if self.days == 0:
+            return 0.0, 0.0
+        denominator = self.days * self.sum_xx - self.sum_x * self.sum_x
+        if abs(denominator) < 1e-9:
+            return self.sum_y / self.days, 0.0
+        slope = (self.days * self.sum_xy - self.sum_x * self.sum_y) / denominator
+        return (self.sum_y - slope * self.sum_x) / self.days, slope
+
+    def predict(self, degree_days: float) -> float:
+        base_load, slope = self.coefficients()
+        return base_load + slope * degree_days
+
+    def residual_deviation(self) -> float:
+        """Returns the standard deviation of the daily residuals of the fit."""
+        if self.days <= 2:
+            return 0.0
+        base_load, slope = self.coefficients()
+        squared_error = self.sum_yy - base_load * self.sum_y - slope * self.sum_xy
+        return math.sqrt(max(squared_error, 0.0) / (self.days - 2))
+
+    def to_dict(self) -> dict:
+        return dict(vars(self))
+
+    @classmethod
+    def from_dict(cls, values: dict) -> "DegreeDayModel":
+        model = cls()
+        for name in vars(model):
+            setattr(model, name, values[name])
+        return model
+
+class TemperatureRegression:
+    """Degree day regression of one site, refitted incrementally as new days arrive."""
+    def __init__(self, base_temperature: float = HEATING_BASE_TEMPERATURE):
+        self.base_temperature = base_temperature
+        self.model = DegreeDayModel()
+        self.last_day = None
+        self.fingerprint = days_fingerprint([])
+
+    def update(self, rollups: RollupIndex) -> int:
+        """Adds the full days after the last fitted day to the model. Returns the number of days added.
+
+        The fitted days are compared with the fingerprint saved with the model. If
+        the data up to the last fitted day has changed, for example a re-export
+        corrected old values or the file was cut short, the model is fitted again
+        from the beginning.
+        """
+        days = daily_rollups(rollups)
+        fitted = 0 if self.last_day is None else bisect_right(days, self.last_day, key=operator.itemgetter(0))
+        if days_fingerprint(days[:fitted]) != self.fingerprint:
+            self.model = DegreeDayModel()
+            self.last_day = None
+            fitted = 0
+        new_days = days[fitted:]
+        if new_days:
+            self.model.add_days([heating_degree_days(day[3], self.base_temperature) for day in new_days], [day[2] for day in new_days])
+            self.last_day = new_days[-1][0]
+        self.fingerprint = days_fingerprint(days)
+        return len(new_days)
+
+    def normalized_consumption(self, rollups: RollupIndex, start_date: date, end_date: date, normal_degree_days: float) -> list[float]:
+        """Returns [consumption, weather-normalized consumption, degree days] of the range.
+
+        The normalized consumption is the consumption the site would have had with
+        the heating degree days of a normal year for the range, normal_degree_days,
+        instead of the actual ones.
+        """
+        days = [day for day in daily_rollups(rollups) if start_date.toordinal() <= day[0] <= end_date.toordinal()]
+        consumption = sum(day[2] for day in days)
+        degree_days = sum(heating_degree_days(day[3], self.base_temperature) for day in days)
+        _, slope = self.model.coefficients()
+        return [consumption, consumption + slope * (normal_degree_days - degree_days), degree_days]
+
+    def anomalies(self, rollups: RollupIndex, limit: float = ANOMALY_LIMIT) -> list[list]:
+        """Returns [date, consumption, expected consumption, mean temperature] of the days whose
+        consumption differs from the fit by more than limit standard deviations."""
+        deviation = self.model.residual_deviation()
+        if deviation == 0.0:
+            return []
+        anomalies = []
+        for ordinal, _, consumption, mean_temperature in daily_rollups(rollups):
+            expected = self.model.predict(heating_degree_days(mean_temperature, self.base_temperature))
+            if abs(consumption - expected) > limit * deviation:
+                anomalies.append([date.fromordinal(ordinal), consumption, expected, mean_temperature])
+        return anomalies
+
+    def save(self, state_file: str) -> None:
+        state = {
+            "version": STATE_VERSION,
+            "base_temperature": self.base_temperature,
+            "last_day": self.last_day,
+            "fingerprint": self.fingerprint,
+            "model": self.model.to_dict()
+        }
+        with open(state_file, "w", encoding="utf-8") as file:
+            json.dump(state, file, indent=2)
+
+    @classmethod
+    def load(cls, state_file: str, base_temperature: float = HEATING_BASE_TEMPERATURE) -> "TemperatureRegression":
+        """Loads a saved regression, or returns a new one if the file is missing, invalid or for another base temperature."""
+        regression = cls(base_temperature)
+        try:
+            with open(state_file, "r", encoding="utf-8") as file:
+                state = json.load(file)
+            if state["version"] != STATE_VERSION or state["base_temperature"] != base_temperature:
+                return regression
+            regression.model = DegreeDayModel.from_dict(state["model"])
+            regression.last_day = state["last_day"]
+            regression.fingerprint = state["fingerprint"]
+        except (OSError, ValueError, KeyError, TypeError):
+            return cls(base_temperature)
+        return regression
+
+def regression_state_path(meter_datafile: str) -> Path:
+    """Returns the path of the regression state kept next to the data file."""
+    return Path(str(meter_datafile) + ".regression.json")
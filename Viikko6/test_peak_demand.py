@@ -0,0 +1,34 @@
+# Copyright 2025 Niko Hätälä
+# License: MIT
+
+import random
+from peak_demand import LoadDurationCurve, peak_window, rolling_peak_demand, sliding_maximum, top_hours
+from rollup_index import RollupIndex
+
+def test_load_curve_bins_edges_exactly():
+    curve = LoadDurationCurve(0.05)
+    curve.add([0.15, 0.149, 0.2, 0.3])
+    assert curve.counts == {3: 1, 2: 1, 4: 1, 6: 1}
+    assert curve.hours_above(0.15) == 3
+    assert curve.curve() == [(1, 0.3), (2, 0.2), (3, 0.15), (4, 0.1)]
+
+def test_sliding_maximum_matches_window_max():
+    values = [random.Random(7).random() for _ in range(300)]
+    positions = sliding_maximum(values, 7)
+    for position in range(len(values)):
+        assert values[positions[position]] == max(values[max(0, position - 6):position + 1])
+
+def test_rolling_peak_demand_matches_scan(store):
+    rollups = RollupIndex(store)
+    for day, row in rolling_peak_demand(store, rollups, 10):
+        rows = [index for index in range(len(store)) if 0 <= (day - store.date_at(index)).days < 10]
+        assert store.consumption[row] == max(store.consumption[index] for index in rows)
+
+def test_top_hours_and_peak_window(store):
+    consumption = list(store.consumption)
+    assert [consumption[row] for row in top_hours(store, 0, len(store), 5)] == sorted(consumption, reverse=True)[:5]
+    averages = [sum(consumption[row:row + 3]) / 3 for row in range(len(consumption) - 2)]
+    start, average = peak_window(store, 0, len(store), 3)
+    assert start == averages.index(max(averages))
+    assert abs(average - max(averages)) < 1e-9
+    assert peak_window(store, 0, 2, 3) is None
@@ -0,0 +1,40 @@
+# Copyright 2025 Niko Hätälä
+# License: MIT
+
+from datetime import date, timedelta
+from decimal import Decimal
+from meter_store import MeterStore
+from rollup_index import RollupIndex
+
+def plain_sums(store: MeterStore, start_date: date, end_date: date) -> list:
+    """Sums the rows of the range one by one as exact decimals."""
+    consumption = production = temperature = net_load = Decimal(0)
+    rows = 0
+    for index in range(len(store)):
+        if start_date <= store.date_at(index) <= end_date:
+            consumption += Decimal(repr(store.consumption[index]))
+            production += Decimal(repr(store.production[index]))
+            temperature += Decimal(repr(store.temperature[index]))
+            net_load += Decimal(repr(store.production[index])) - Decimal(repr(store.consumption[index]))
+            rows += 1
+    return [float(consumption), float(production), float(temperature), float(net_load), rows]
+
+def test_range_summary_matches_exact_row_sums(store):
+    rollups = RollupIndex(store)
+    first = store.first_date()
+    for offset, length in [(0, 0), (0, 59), (3, 1), (10, 20), (45, 30), (-5, 3), (58, 10)]:
+        start_date = first + timedelta(days=offset)
+        end_date = start_date + timedelta(days=length)
+        assert rollups.range_summary(start_date, end_date)[:5] == plain_sums(store, start_date, end_date)
+
+def test_range_summary_extreme_rows(store):
+    rollups = RollupIndex(store)
+    start_date, end_date = date(2025, 3, 5), date(2025, 3, 17)
+    rows = [index for index in range(len(store)) if start_date <= store.date_at(index) <= end_date]
+    summary = rollups.range_summary(start_date, end_date)
+    assert store.consumption[summary[5]] == max(store.consumption[index] for index in rows)
+    assert store.consumption[summary[6]] == min(store.consumption[index] for index in rows)
+
+def test_range_summary_without_rows(store):
+    rollups = RollupIndex(store)
+    assert rollups.range_summary(date(2024, 1, 1), date(2024, 1, 31)) == [0.0, 0.0, 0.0, 0.0, 0, None, None]
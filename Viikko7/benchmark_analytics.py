@@ -0,0 +1,48 @@
+# Copyright (c) 2025 Ville Heikkiniemi
+#
+# This code is licensed under the MIT License.
+# You are free to use, modify, and distribute this code,
+# provided that the original copyright notice is retained.
+#
+# See LICENSE file in the project root for full license information.
+
+"""Measures analyze() on synthetic reservation tables of 10^3 to 10^6 rows."""
+
+import random
+from time import perf_counter
+from reservation_analytics import analyze
+from reservation_table import ReservationTable
+
+ROOMS = ["Metsätila 1", "Kukkahuone", "Punainen Huone", "Varastotila N", "Kasvitutkimuslabra"]
+
+def synthetic_table(rows: int, seed: int = 1) -> ReservationTable:
+    """Builds a table of random reservations during 2025."""
+    generator = random.Random(seed)
+    table = ReservationTable()
+    start = 1735689600
+    for row in range(rows):
+        table.ids.append(row + 1)
+        table.names.append(f"Asiakas {row}")
+        table.emails.append(f"asiakas{row}@example.com")
+        table.phones.append("0400000000")
+        table.starts.append(start + generator.randrange(365) * 86400 + generator.randrange(8, 20) * 3600)
+        table.durations.append(generator.randint(1, 6))
+        table.prices.append(round(generator.uniform(5, 50), 2))
+        if row % 8 == 0:
+            table.confirmed_bits.append(0)
+        if generator.random() < 0.6:
+            table.confirmed_bits[row >> 3] |= 1 << (row & 7)
+        table.room_codes.append(table.room_code(generator.choice(ROOMS)))
+        table.created.append(start - generator.randrange(90) * 86400)
+    return table
+
+def main():
+    for rows in (10 ** 3, 10 ** 4, 10 ** 5, 10 ** 6):
+        table = synthetic_table(rows)
+        started = perf_counter()
+        analyze(table)
+        elapsed = perf_counter() - started
+        print(f"{rows:>9} riviä: {elapsed * 1000:9.2f} ms ({elapsed / rows * 1e9:6.1f} ns/rivi)")
+
+if __name__ == "__main__":
+    main()
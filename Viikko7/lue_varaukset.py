@@ -12,36 +12,72 @@
 # On todella paljon helpommin luettavaa ilman listoja, koska kaikilla varauksen osilla on selkeät nimet.
 # Myös kaikki funktiot ja metodit ovat selkeitä ja helposti ymmärrettäviä.
 
-from datetime import datetime
+from bisect import bisect_left, bisect_right
+from datetime import date, datetime, time
+from reservation_figures import analyze_columns
+
+def decode_date(text: str) -> date:
+    """Decodes a YYYY-MM-DD date like strptime, reading the fields by position when the layout is exact."""
+    if len(text) == 10 and text[4] == text[7] == "-" and text[:4].isdecimal() and text[5:7].isdecimal() and text[8:].isdecimal():
+        return date(int(text[:4]), int(text[5:7]), int(text[8:]))
+    return datetime.strptime(text, "%Y-%m-%d").date()
+
+def decode_time(text: str) -> time:
+    """Decodes a HH:MM time like strptime, reading the fields by position when the layout is exact."""
+    if len(text) == 5 and text[2] == ":" and text[:2].isdecimal() and text[3:].isdecimal():
+        return time(int(text[:2]), int(text[3:]))
+    return datetime.strptime(text, "%H:%M").time()
+
+def decode_datetime(text: str) -> datetime:
+    """Decodes a YYYY-MM-DD HH:MM:SS timestamp like strptime, reading the fields by position when the layout is exact."""
+    if len(text) == 19 and text[10] == " " and text[13] == text[16] == ":" and text[17:].isdecimal() and text[14:16].isdecimal() and text[11:13].isdecimal():
+        return datetime.combine(decode_date(text[:10]), time(int(text[11:13]), int(text[14:16]), int(text[17:])))
+    return datetime.strptime(text, "%Y-%m-%d %H:%M:%S")
+
+FIELD_DECODERS = {
+    "reservation_id": int,
+    "name": str,
+    "email": str,
+    "phone": str,
+    "reservation_date": decode_date,
+    "reservation_time": decode_time,
+    "reservation_duration": int,
+    "price": float,
+    "reservation_confirmed": lambda text: text.lower() == "true",
+    "reserved_room": str,
+    "reservation_created": decode_datetime
+}
 
 def edit_reservation(reservations: list[str]) -> object:
     """Edits data types and generates a Reservation object from a list of reservation details."""
-    return Reservation(
-        reservation_id=int(reservations[0]),
-        name = reservations[1],
-        email = reservations[2],
-        phone = reservations[3],
-        reservation_date = datetime.strptime(reservations[4], "%Y-%m-%d").date(),
-        reservation_time = datetime.strptime(reservations[5], "%H:%M").time(),
-        reservation_duration = int(reservations[6]),
-        price = float(reservations[7]),
-        reservation_confirmed = reservations[8].lower() == "true",
-        reserved_room = reservations[9],
-        reservation_created = datetime.strptime(reservations[10], "%Y-%m-%d %H:%M:%S")
-    )
+    return Reservation(**{field: decode(value) for (field, decode), value in zip(FIELD_DECODERS.items(), reservations, strict=True)})
 
-def get_reservations(reservationfile: str) -> list[object]:
-    """Reads reservations from a file and returns a list of Reservation objects."""
+def get_reservations(reservationfile: str, columns: list[str] | None = None) -> list[object]:
+    """Reads reservations from a file and returns a list of Reservation objects.
+
+    If columns is given, returns LazyReservation objects instead. Only the listed
+    columns are decoded while reading, the others when they are first used.
+    """
+    if columns is not None:
+        unknown = set(columns) - FIELD_DECODERS.keys()
+        if unknown:
+            raise ValueError(f"Tuntemattomat sarakkeet: {', '.join(sorted(unknown))}")
     reservations = []
     with open(reservationfile, "r", encoding="utf-8") as f:
         for reservation in f:
             reservation = reservation.strip()
             reservation_details = reservation.split('|')
-            reservations.append(edit_reservation(reservation_details))
+            if columns is None:
+                reservations.append(edit_reservation(reservation_details))
+            else:
+                reservations.append(LazyReservation(reservation_details, columns))
     return reservations
 
 class Reservation:
     """A class to represent a reservation."""
+    __slots__ = ("reservation_id", "name", "email", "phone", "reservation_date", "reservation_time",
+                 "reservation_duration", "price", "reservation_confirmed", "reserved_room", "reservation_created")
+
     def __init__(self, reservation_id: int, name: str, email: str, phone: str, reservation_date: datetime.date,
                  reservation_time: datetime.time, reservation_duration: int, price: float, reservation_confirmed: bool,
                  reserved_room: str, reservation_created: datetime):
@@ -69,19 +105,122 @@ class Reservation:
         """Calculates the total price of the reservation."""
         return self.reservation_duration * self.price
 
-def confirmed_reservations(reservations: list[Reservation]) -> None:
-    for reservation in reservations:
+NOT_DECODED = object()
+
+class LazyField:
+    """A reservation attribute decoded from the raw field on first access."""
+    def __init__(self, index: int, decode):
+        self.index = index
+        self.decode = decode
+
+    def __get__(self, reservation, owner=None):
+        if reservation is None:
+            return self
+        value = reservation._values[self.index]
+        if value is NOT_DECODED:
+            value = self.decode(reservation._fields[self.index])
+            reservation._values[self.index] = value
+        return value
+
+class LazyReservation:
+    """A reservation that keeps the raw fields and decodes each one when it is first used.
+
+    The decoded values are cached. The columns given to the constructor are
+    decoded right away, so invalid values in them are found while loading.
+    """
+    __slots__ = ("_fields", "_values")
+
+    def __init__(self, fields: list[str], columns: list[str] = ()):
+        if len(fields) != len(FIELD_DECODERS):
+            raise ValueError(f"Varauksessa on {len(fields)} kenttää, odotettiin {len(FIELD_DECODERS)}.")
+        self._fields = fields
+        self._values = [NOT_DECODED] * len(fields)
+        for column in columns:
+            getattr(self, column)
+
+    long_reservation = Reservation.long_reservation
+    confirmed = Reservation.confirmed
+    total_price = Reservation.total_price
+
+for index, (field, decode) in enumerate(FIELD_DECODERS.items()):
+    setattr(LazyReservation, field, LazyField(index, decode))
+
+class ReservationRepository:
+    """Reservations indexed by id, room and reservation date.
+
+    The id and room indexes are dictionaries and the date index is kept sorted for
+    bisect range queries. The confirmed and long reservations and the confirmed
+    revenue are kept up to date as reservations are added, so the report sections
+    do not scan all reservations.
+    """
+    def __init__(self, reservations: list[Reservation] = ()):
+        self.reservations = []
+        self.by_id = {}
+        self.by_room = {}
+        self.dates = []
+        self.by_date = []
+        self.confirmed_reservations = []
+        self.long_reservations = []
+        self.confirmed_revenue = 0.0
+        for reservation in reservations:
+            self._index(reservation)
+        order = sorted(range(len(self.reservations)), key=lambda index: self.reservations[index].reservation_date)
+        self.by_date = [self.reservations[index] for index in order]
+        self.dates = [reservation.reservation_date for reservation in self.by_date]
+
+    def __len__(self) -> int:
+        return len(self.reservations)
+
+    def __iter__(self):
+        return iter(self.reservations)
+
+    def _index(self, reservation: Reservation) -> None:
+        """Adds the reservation to every index except the date index."""
+        if reservation.reservation_id in self.by_id:
+            raise ValueError(f"Varaus {reservation.reservation_id} on jo olemassa.")
+        self.reservations.append(reservation)
+        self.by_id[reservation.reservation_id] = reservation
+        self.by_room.setdefault(reservation.reserved_room, []).append(reservation)
         if reservation.confirmed():
-            print(f"- {reservation.name}, {reservation.reserved_room}, {reservation.reservation_date.strftime('%d.%m.%Y')} klo {reservation.reservation_time.strftime('%H.%M')}")
+            self.confirmed_reservations.append(reservation)
+            self.confirmed_revenue += reservation.total_price()
+        if reservation.long_reservation():
+            self.long_reservations.append(reservation)
+
+    def add(self, reservation: Reservation) -> None:
+        """Adds a reservation. Raises ValueError if the id is already in use."""
+        self._index(reservation)
+        position = bisect_right(self.dates, reservation.reservation_date)
+        self.dates.insert(position, reservation.reservation_date)
+        self.by_date.insert(position, reservation)
+
+    def get(self, reservation_id: int) -> Reservation | None:
+        """Returns the reservation with the given id, or None."""
+        return self.by_id.get(reservation_id)
+
+    def in_room(self, room: str) -> list[Reservation]:
+        """Returns the reservations of the room in the order they were added."""
+        return self.by_room.get(room, [])
+
+    def between(self, start_date: date, end_date: date) -> list[Reservation]:
+        """Returns the reservations from start_date to end_date (inclusive) in date order."""
+        return self.by_date[bisect_left(self.dates, start_date):bisect_right(self.dates, end_date)]
+
+    def after(self, day: date) -> list[Reservation]:
+        """Returns the reservations after the given day in date order."""
+        return self.by_date[bisect_right(self.dates, day):]
+
+def confirmed_reservations(reservations: ReservationRepository) -> None:
+    for reservation in reservations.confirmed_reservations:
+        print(f"- {reservation.name}, {reservation.reserved_room}, {reservation.reservation_date.strftime('%d.%m.%Y')} klo {reservation.reservation_time.strftime('%H.%M')}")
     print()
 
-def long_reservations(reservations: list[Reservation]) -> None:
-    for reservation in reservations:
-        if reservation.long_reservation():
-            print(f"- {reservation.name}, {reservation.reservation_date.strftime('%d.%m.%Y')} klo {reservation.reservation_time.strftime('%H.%M')}, kesto {reservation.reservation_duration} h, {reservation.reserved_room}")
+def long_reservations(reservations: ReservationRepository) -> None:
+    for reservation in reservations.long_reservations:
+        print(f"- {reservation.name}, {reservation.reservation_date.strftime('%d.%m.%Y')} klo {reservation.reservation_time.strftime('%H.%M')}, kesto {reservation.reservation_duration} h, {reservation.reserved_room}")
     print()
 
-def reservation_confirmation_status(reservations: list[Reservation]) -> None:
+def reservation_confirmation_status(reservations: ReservationRepository) -> None:
     for reservation in reservations:
         if reservation.confirmed():
             print(f"{reservation.name} → Vahvistettu")
@@ -89,28 +228,30 @@ def reservation_confirmation_status(reservations: list[Reservation]) -> None:
             print(f"{reservation.name} → EI vahvistettu")
     print()
 
-def number_of_reservations(reservations: list[Reservation]) -> None:
-    confirmed_reservations = 0
-    unconfirmed_reservations = 0
-    for reservation in reservations:
-        if reservation.confirmed():
-            confirmed_reservations += 1
-        else:
-            unconfirmed_reservations += 1
+def report_figures(reservations: ReservationRepository) -> dict:
+    """Calculates the figures of the report sections with the shared analyze_columns engine."""
+    return analyze_columns(
+        [reservation.confirmed() for reservation in reservations],
+        [reservation.reservation_duration for reservation in reservations],
+        [reservation.price for reservation in reservations],
+        [reservation.reservation_date for reservation in reservations]
+    )
+
+def number_of_reservations(figures: dict) -> None:
+    confirmed_reservations = figures["confirmed"]
+    unconfirmed_reservations = figures["unconfirmed"]
     print(f"- Vahvistettuja varauksia: {confirmed_reservations} kpl")
     print(f"- Ei-vahvistettuja varauksia: {unconfirmed_reservations} kpl")
     print()
 
-def total_revenue(reservations: list[Reservation]) -> None:
-    total_revenue = 0
-    for reservation in reservations:
-        if reservation.confirmed():
-            total_revenue += reservation.total_price()
+def total_revenue(figures: dict) -> None:
+    total_revenue = figures["confirmed_revenue"]
     print("Vahvistettujen varausten kokonaistulot:", f"{total_revenue:.2f}".replace('.', ','), "€")
     print()
 
 def main():
-    Reservations = get_reservations("varaukset.txt")
+    Reservations = ReservationRepository(get_reservations("varaukset.txt"))
+    figures = report_figures(Reservations)
     print("1) Vahvistetut varaukset")
     confirmed_reservations(Reservations)
     print("2) Pitkät varaukset (≥ 3 h)")
@@ -118,9 +259,9 @@ def main():
     print("3) Varausten vahvistusstatus")
     reservation_confirmation_status(Reservations)
     print("4) Yhteenveto vahvistuksista")
-    number_of_reservations(Reservations)
+    number_of_reservations(figures)
     print("5) Vahvistettujen varausten kokonaistulot")
-    total_revenue(Reservations)
+    total_revenue(figures)
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
@@ -0,0 +1,27 @@
+# Copyright (c) 2025 Ville Heikkiniemi
+#
+# This code is licensed under the MIT License.
+# You are free to use, modify, and distribute this code,
+# provided that the original copyright notice is retained.
+#
+# See LICENSE file in the project root for full license information.
+
+from datetime import date
+from lue_varaukset import Reservation
+from reservation_figures import analyze_columns
+from reservation_table import EPOCH, ReservationTable
+
+SECONDS_PER_DAY = 86400
+
+def analyze(reservations: ReservationTable | list[Reservation]) -> dict:
+    """Calculates the figures of the reservation report sections.
+
+    The figures come from analyze_columns over the columns of the table, see its
+    docstring for the returned dictionary. The per-day counts are keyed by date.
+    """
+    table = reservations if isinstance(reservations, ReservationTable) else ReservationTable.from_reservations(reservations)
+    epoch_ordinal = EPOCH.toordinal()
+    days = map(SECONDS_PER_DAY.__rfloordiv__, table.starts)
+    figures = analyze_columns(table.confirmed(), table.durations, table.prices, days)
+    figures["per_day"] = {date.fromordinal(day + epoch_ordinal): count for day, count in figures["per_day"].items()}
+    return figures
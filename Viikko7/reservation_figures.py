@@ -0,0 +1,41 @@
+# Copyright (c) 2025 Ville Heikkiniemi
+#
+# This code is licensed under the MIT License.
+# You are free to use, modify, and distribute this code,
+# provided that the original copyright notice is retained.
+#
+# See LICENSE file in the project root for full license information.
+
+# The module only uses the standard library, so the Viikko4 report can import it
+# next to its own lue_varaukset module and both weeks share one engine.
+
+from array import array
+from collections import Counter
+from itertools import compress
+import operator
+
+def analyze_columns(confirmed, durations, prices, days) -> dict:
+    """Calculates the figures of the reservation report sections from columns.
+
+    The columns hold the confirmation status (any truth value), the duration in
+    hours, the hourly price and the day of every reservation in file order.
+    Every figure is one sweep over a column, so the work grows linearly with the
+    number of reservations. Returns a dictionary with the confirmed and
+    unconfirmed counts, the confirmed revenue, the row of the most expensive
+    confirmed reservation (the first one on a tie, zero-priced ones included,
+    None if nothing is confirmed), the number of reservations per day in the
+    order the days first appear, and the average duration of the confirmed
+    reservations.
+    """
+    confirmed = bytes(map(bool, confirmed))
+    confirmed_count = confirmed.count(1)
+    total_prices = array("d", map(operator.mul, durations, prices))
+    confirmed_rows = compress(range(len(confirmed)), confirmed)
+    return {
+        "confirmed": confirmed_count,
+        "unconfirmed": len(confirmed) - confirmed_count,
+        "confirmed_revenue": sum(compress(total_prices, confirmed)),
+        "most_expensive": max(confirmed_rows, key=total_prices.__getitem__, default=None),
+        "per_day": dict(Counter(days)),
+        "average_confirmed_duration": sum(compress(durations, confirmed)) / confirmed_count if confirmed_count else 0.0
+    }
@@ -0,0 +1,69 @@
+# Copyright (c) 2025 Ville Heikkiniemi
+#
+# This code is licensed under the MIT License.
+# You are free to use, modify, and distribute this code,
+# provided that the original copyright notice is retained.
+#
+# See LICENSE file in the project root for full license information.
+
+import heapq
+from itertools import count
+from operator import attrgetter
+from lue_varaukset import Reservation
+
+RANKING_KEYS = {
+    "total_price": Reservation.total_price,
+    "duration": attrgetter("reservation_duration"),
+    "created": attrgetter("reservation_created")
+}
+
+def top_k(reservations, k: int, key=Reservation.total_price) -> list[Reservation]:
+    """Returns the k reservations with the largest key, largest first.
+
+    Reservations with equal keys keep their original order. Takes O(n log k)
+    time and O(k) memory.
+    """
+    return heapq.nlargest(k, reservations, key=key)
+
+def top_k_rows(values, k: int) -> list[int]:
+    """Returns the row numbers of the k largest values of a column, e.g. ReservationTable.total_price()."""
+    return heapq.nlargest(k, range(len(values)), key=values.__getitem__)
+
+class BoundedTopK:
+    """Keeps the k reservations with the largest key while reservations are pushed one at a time.
+
+    The kept reservations are a min-heap, so a new reservation only has to be
+    compared with the smallest of them. Of reservations with equal keys the
+    earlier ones are kept, like in top_k. Raises ValueError if k is negative.
+    """
+    def __init__(self, k: int, key=Reservation.total_price):
+        if k < 0:
+            raise ValueError(f"Järjestettävien varausten määrä ei voi olla negatiivinen: {k}")
+        self.k = k
+        self.key = key
+        self.heap = []
+        self.order = count()
+
+    def __len__(self) -> int:
+        return len(self.heap)
+
+    def push(self, reservation: Reservation) -> None:
+        value = self.key(reservation)
+        if len(self.heap) < self.k:
+            heapq.heappush(self.heap, (value, -next(self.order), reservation))
+        elif self.k and value > self.heap[0][0]:
+            heapq.heapreplace(self.heap, (value, -next(self.order), reservation))
+
+    def items(self) -> list[Reservation]:
+        """Returns the kept reservations, largest key first."""
+        return [reservation for _, _, reservation in sorted(self.heap, key=lambda entry: entry[:2], reverse=True)]
+
+def top_k_per_room(reservations, k: int, key=Reservation.total_price) -> dict[str, list[Reservation]]:
+    """Returns the k reservations with the largest key of every room."""
+    rooms = {}
+    for reservation in reservations:
+        ranking = rooms.get(reservation.reserved_room)
+        if ranking is None:
+            ranking = rooms[reservation.reserved_room] = BoundedTopK(k, key)
+        ranking.push(reservation)
+    return {room: ranking.items() for room, ranking in rooms.items()}
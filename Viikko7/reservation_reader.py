@@ -0,0 +1,120 @@
+# Copyright (c) 2025 Ville Heikkiniemi
+#
+# This code is licensed under the MIT License.
+# You are free to use, modify, and distribute this code,
+# provided that the original copyright notice is retained.
+#
+# See LICENSE file in the project root for full license information.
+
+import mmap
+import re
+from lue_varaukset import FIELD_DECODERS, LazyReservation
+
+WHITESPACE = b" \t\r\n"
+CONFIRMED_FIELD = list(FIELD_DECODERS).index("reservation_confirmed")
+CONFIRMED_PATTERN = re.compile(rb"\|(?i:true)(?=\|)")
+
+class RecordView:
+    """One line of a '|' separated file as a view into its memory map.
+
+    The field boundaries are searched when a field is first used, and a field is
+    only decoded to a string when it is read with view[index]. raw(index) returns
+    the field bytes without copying them.
+    """
+    __slots__ = ("data", "view", "start", "stop", "_bounds")
+
+    def __init__(self, data: mmap.mmap, view: memoryview, start: int, stop: int):
+        self.data = data
+        self.view = view
+        self.start = start
+        self.stop = stop
+        self._bounds = None
+
+    def bounds(self) -> list[int]:
+        """Returns the separator positions, starting with start - 1 and ending with stop."""
+        if self._bounds is None:
+            bounds = [self.start - 1]
+            position = self.data.find(b"|", self.start, self.stop)
+            while position >= 0:
+                bounds.append(position)
+                position = self.data.find(b"|", position + 1, self.stop)
+            bounds.append(self.stop)
+            self._bounds = bounds
+        return self._bounds
+
+    def __len__(self) -> int:
+        return len(self.bounds()) - 1
+
+    def raw(self, index: int) -> memoryview:
+        bounds = self.bounds()
+        return self.view[bounds[index] + 1:bounds[index + 1]]
+
+    def __getitem__(self, index: int) -> str:
+        return str(self.raw(index), "utf-8")
+
+    def fields(self) -> list[str]:
+        return [self[index] for index in range(len(self))]
+
+def line_spans(data: mmap.mmap):
+    """Yields the (start, stop) byte ranges of the non-empty lines without surrounding whitespace."""
+    size = len(data)
+    position = 0
+    while position < size:
+        end = data.find(b"\n", position)
+        if end < 0:
+            end = size
+        start, stop = position, end
+        while start < stop and data[start] in WHITESPACE:
+            start += 1
+        while stop > start and data[stop - 1] in WHITESPACE:
+            stop -= 1
+        if start < stop:
+            yield start, stop
+        position = end + 1
+
+def map_file(reservationfile: str) -> mmap.mmap | None:
+    """Maps the file into memory read-only. Returns None for an empty file."""
+    with open(reservationfile, "rb") as file:
+        try:
+            return mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+        except ValueError:
+            return None
+
+def iter_records(reservationfile: str):
+    """Yields a RecordView of every line of the file."""
+    data = map_file(reservationfile)
+    if data is None:
+        return
+    view = memoryview(data)
+    for start, stop in line_spans(data):
+        yield RecordView(data, view, start, stop)
+
+def confirmed_records(reservationfile: str):
+    """Yields a RecordView of every confirmed reservation of the file.
+
+    The file is searched for a '|true|' field in any letter case, and a match is
+    accepted when it is the confirmation field of its line. Unconfirmed lines are
+    skipped inside the regular expression engine without creating any objects.
+    """
+    data = map_file(reservationfile)
+    if data is None:
+        return
+    view = memoryview(data)
+    for match in CONFIRMED_PATTERN.finditer(data):
+        start = data.rfind(b"\n", 0, match.start()) + 1
+        if data[start:match.start()].count(b"|") != CONFIRMED_FIELD - 1:
+            continue
+        stop = data.find(b"\n", match.end())
+        if stop < 0:
+            stop = len(data)
+        while stop > start and data[stop - 1] in WHITESPACE:
+            stop -= 1
+        yield RecordView(data, view, start, stop)
+
+def get_mapped_reservations(reservationfile: str, columns: list[str] = ()) -> list[LazyReservation]:
+    """Reads reservations through the memory map as LazyReservation objects.
+
+    The records keep their RecordView, so a field is only decoded from the file
+    when it is used. The listed columns are decoded while reading.
+    """
+    return [LazyReservation(record, columns) for record in iter_records(reservationfile)]
@@ -0,0 +1,165 @@
+# Copyright (c) 2025 Ville Heikkiniemi
+#
+# This code is licensed under the MIT License.
+# You are free to use, modify, and distribute this code,
+# provided that the original copyright notice is retained.
+#
+# See LICENSE file in the project root for full license information.
+
+"""Receives reservation lines over a local TCP socket and appends them to the reservation file.
+
+Every line is answered in order with "OK <id>" once it has been written, or with
+"VIRHE <reason>" if it was rejected.
+"""
+
+import asyncio
+import os
+from lue_varaukset import ReservationRepository, edit_reservation, get_reservations
+from revenue_cube import RevenueCube
+
+HOST = "127.0.0.1"
+PORT = 8765
+
+class ReservationService:
+    """Validates reservation lines and appends them to the file in batches.
+
+    Accepted reservations wait in a queue. The writer takes everything that has
+    arrived, up to batch_size lines, and writes and syncs them with one write
+    (group commit). The reservations are then added to the repository, which
+    keeps the indexes and totals up to date, and to the revenue cube, and their
+    senders are answered.
+    While one batch is being written the next one collects in the queue.
+    """
+    def __init__(self, reservationfile: str, batch_size: int = 1024, sync: bool = True):
+        self.reservationfile = reservationfile
+        self.batch_size = batch_size
+        self.sync = sync
+        existing = os.path.isfile(reservationfile) and os.path.getsize(reservationfile) > 0
+        self.repository = ReservationRepository(get_reservations(reservationfile) if existing else [])
+        self.revenue = RevenueCube(self.repository)
+        self.needs_newline = existing and not self._ends_with_newline()
+        self.pending_ids = set()
+        self.queue = asyncio.Queue()
+        self.writer_task = None
+
+    def _ends_with_newline(self) -> bool:
+        with open(self.reservationfile, "rb") as file:
+            file.seek(-1, os.SEEK_END)
+            return file.read(1) == b"\n"
+
+    def submit(self, line: str) -> asyncio.Future:
+        """Validates a reservation line and queues it for writing.
+
+        Returns a future that gets the reservation id once the line has been
+        written. Raises ValueError if the line is invalid or the id is in use.
+        """
+        line = line.strip()
+        try:
+            reservation = edit_reservation(line.split('|'))
+        except ValueError as error:
+            raise ValueError(f"virheellinen varaus: {error}") from None
+        if reservation.reservation_id in self.pending_ids or self.repository.get(reservation.reservation_id):
+            raise ValueError(f"Varaus {reservation.reservation_id} on jo olemassa.")
+        if self.writer_task is None:
+            self.writer_task = asyncio.create_task(self._write_batches())
+        self.pending_ids.add(reservation.reservation_id)
+        future = asyncio.get_running_loop().create_future()
+        self.queue.put_nowait((reservation, line, future))
+        return future
+
+    def _commit(self, lines: list[str]) -> None:
+        """Appends the lines to the reservation file and syncs it to disk."""
+        text = "\n".join(lines) + "\n"
+        if self.needs_newline:
+            text = "\n" + text
+        with open(self.reservationfile, "a", encoding="utf-8") as file:
+            file.write(text)
+            file.flush()
+            if self.sync:
+                os.fsync(file.fileno())
+        self.needs_newline = False
+
+    def _fail_batch(self, batch: list, error: BaseException) -> None:
+        """Answers every still unanswered reservation of the batch with the error."""
+        for reservation, _, future in batch:
+            self.pending_ids.discard(reservation.reservation_id)
+            if not future.done():
+                future.set_exception(error)
+
+    async def _write_batches(self) -> None:
+        while True:
+            batch = [await self.queue.get()]
+            while len(batch) < self.batch_size and not self.queue.empty():
+                batch.append(self.queue.get_nowait())
+            try:
+                await asyncio.to_thread(self._commit, [line for _, line, _ in batch])
+                for reservation, _, future in batch:
+                    self.repository.add(reservation)
+                    self.revenue.add(reservation)
+                    self.pending_ids.discard(reservation.reservation_id)
+                    future.set_result(reservation.reservation_id)
+            except asyncio.CancelledError:
+                self._fail_batch(batch, ConnectionError("varauspalvelu suljettiin"))
+                raise
+            except Exception as error:
+                self._fail_batch(batch, error)
+
+    async def handle_client(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        """Answers the lines of one connection in the order they were sent."""
+        answers = asyncio.Queue()
+
+        async def send_answers():
+            while (answer := await answers.get()) is not None:
+                try:
+                    writer.write(f"OK {await answer}\n".encode("utf-8"))
+                except Exception as error:
+                    writer.write(f"VIRHE {error}\n".encode("utf-8"))
+                if answers.empty():
+                    await writer.drain()
+
+        sender = asyncio.create_task(send_answers())
+        try:
+            while line := await reader.readline():
+                if not line.strip():
+                    continue
+                try:
+                    answers.put_nowait(self.submit(line.decode("utf-8")))
+                except ValueError as error:
+                    failed = asyncio.get_running_loop().create_future()
+                    failed.set_exception(error)
+                    answers.put_nowait(failed)
+        finally:
+            answers.put_nowait(None)
+            await sender
+            writer.close()
+            await writer.wait_closed()
+
+    async def serve(self, host: str = HOST, port: int = PORT) -> asyncio.Server:
+        return await asyncio.start_server(self.handle_client, host, port)
+
+    def confirmed_count(self) -> int:
+        return len(self.repository.confirmed_reservations)
+
+    def total_revenue(self) -> float:
+        return self.repository.confirmed_revenue
+
+async def send_reservations(lines: list[str], host: str = HOST, port: int = PORT) -> list[str]:
+    """Sends reservation lines to the service and returns its answers in the same order."""
+    reader, writer = await asyncio.open_connection(host, port)
+    writer.write("".join(line.strip() + "\n" for line in lines).encode("utf-8"))
+    await writer.drain()
+    writer.write_eof()
+    answers = (await reader.read()).decode("utf-8").splitlines()
+    writer.close()
+    await writer.wait_closed()
+    return answers
+
+async def run_service(reservationfile: str) -> None:
+    service = ReservationService(reservationfile)
+    server = await service.serve()
+    print(f"Vastaanotetaan varauksia osoitteessa {HOST}:{PORT}, tiedosto {reservationfile}")
+    async with server:
+        await server.serve_forever()
+
+if __name__ == "__main__":
+    asyncio.run(run_service("varaukset.txt"))
@@ -0,0 +1,158 @@
+# Copyright (c) 2025 Ville Heikkiniemi
+#
+# This code is licensed under the MIT License.
+# You are free to use, modify, and distribute this code,
+# provided that the original copyright notice is retained.
+#
+# See LICENSE file in the project root for full license information.
+
+"""Binary snapshots of reservation tables.
+
+A snapshot starts with a header (magic, schema version, column count, row
+count) and a descriptor of every column (name, array typecode, item count).
+The columns follow, each padded to 8 bytes. Names, emails, phone numbers and
+rooms are stored once in a string dictionary (offsets and UTF-8 data) and the
+rows refer to them by code.
+"""
+
+import argparse
+from array import array
+import mmap
+import struct
+from lue_varaukset import get_reservations
+from reservation_table import ReservationTable
+
+SNAPSHOT_MAGIC = b"RSVS"
+SNAPSHOT_VERSION = 1
+HEADER = struct.Struct("<4sHHQ")
+COLUMN = struct.Struct("<16sc7xQ")
+
+class StringDictionary:
+    """Strings stored as UTF-8 data and offsets, decoded when they are read."""
+    def __init__(self, offsets, data):
+        self.offsets = offsets
+        self.data = data
+
+    def __len__(self) -> int:
+        return len(self.offsets) - 1
+
+    def __getitem__(self, code: int) -> str:
+        return str(self.data[self.offsets[code]:self.offsets[code + 1]], "utf-8")
+
+class StringColumn:
+    """A column of strings given as codes into a StringDictionary."""
+    def __init__(self, codes, dictionary: StringDictionary):
+        self.codes = codes
+        self.dictionary = dictionary
+
+    def __len__(self) -> int:
+        return len(self.codes)
+
+    def __getitem__(self, row: int) -> str:
+        return self.dictionary[self.codes[row]]
+
+    def __iter__(self):
+        return map(self.dictionary.__getitem__, self.codes)
+
+def encode_strings(table: ReservationTable) -> dict[str, array]:
+    """Builds the string dictionary and the code columns of the table."""
+    codes = {}
+    def code_column(strings) -> array:
+        return array("I", [codes.setdefault(string, len(codes)) for string in strings])
+    columns = {
+        "name_codes": code_column(table.names),
+        "email_codes": code_column(table.emails),
+        "phone_codes": code_column(table.phones),
+        "room_names": code_column(table.rooms)
+    }
+    data = bytearray()
+    offsets = array("Q", [0])
+    for string in codes:
+        data += string.encode("utf-8")
+        offsets.append(len(data))
+    columns["string_offsets"] = offsets
+    columns["string_data"] = array("B", data)
+    return columns
+
+def save_snapshot(table: ReservationTable, snapshotfile: str) -> None:
+    """Writes the reservation table to a snapshot file."""
+    columns = {
+        "ids": table.ids,
+        "starts": table.starts,
+        "durations": table.durations,
+        "prices": table.prices,
+        "confirmed_bits": array("B", table.confirmed_bits),
+        "room_codes": table.room_codes,
+        "created": table.created
+    }
+    columns.update(encode_strings(table))
+    with open(snapshotfile, "wb") as file:
+        file.write(HEADER.pack(SNAPSHOT_MAGIC, SNAPSHOT_VERSION, len(columns), len(table)))
+        for name, column in columns.items():
+            file.write(COLUMN.pack(name.encode("utf-8"), column.typecode.encode("ascii"), len(column)))
+        for column in columns.values():
+            data = column.tobytes()
+            file.write(data)
+            file.write(b"\0" * (-len(data) % 8))
+
+def load_snapshot(snapshotfile: str) -> ReservationTable:
+    """Loads a reservation table from a snapshot file without parsing it.
+
+    The number columns are read-only memoryviews into a memory map of the file and
+    strings are decoded when they are read, so the table cannot be appended to.
+    Raises ValueError if the file is not a snapshot of this schema version.
+    """
+    with open(snapshotfile, "rb") as file:
+        try:
+            snapshot = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+        except ValueError:
+            raise ValueError(f"{snapshotfile} ei ole varaustiedoston tilannekuva.") from None
+    if len(snapshot) < HEADER.size:
+        raise ValueError(f"{snapshotfile} ei ole varaustiedoston tilannekuva.")
+    magic, version, column_count, rows = HEADER.unpack_from(snapshot)
+    if magic != SNAPSHOT_MAGIC:
+        raise ValueError(f"{snapshotfile} ei ole varaustiedoston tilannekuva.")
+    if version != SNAPSHOT_VERSION:
+        raise ValueError(f"Tilannekuvan {snapshotfile} versiota {version} ei tueta.")
+    columns = {}
+    offset = HEADER.size + column_count * COLUMN.size
+    for number in range(column_count):
+        name, typecode, length = COLUMN.unpack_from(snapshot, HEADER.size + number * COLUMN.size)
+        typecode = typecode.decode("ascii")
+        size = length * array(typecode).itemsize
+        if offset + size > len(snapshot):
+            raise ValueError(f"Tilannekuva {snapshotfile} on katkennut.")
+        columns[name.rstrip(b"\0").decode("utf-8")] = memoryview(snapshot)[offset:offset + size].cast(typecode)
+        offset += size + (-size % 8)
+    strings = StringDictionary(columns["string_offsets"], columns["string_data"])
+    table = ReservationTable()
+    table.ids = columns["ids"]
+    table.starts = columns["starts"]
+    table.durations = columns["durations"]
+    table.prices = columns["prices"]
+    table.confirmed_bits = columns["confirmed_bits"]
+    table.room_codes = columns["room_codes"]
+    table.created = columns["created"]
+    table.names = StringColumn(columns["name_codes"], strings)
+    table.emails = StringColumn(columns["email_codes"], strings)
+    table.phones = StringColumn(columns["phone_codes"], strings)
+    table.rooms = list(StringColumn(columns["room_names"], strings))
+    table.room_index = {room: code for code, room in enumerate(table.rooms)}
+    return table
+
+def convert_to_snapshot(reservationfile: str, snapshotfile: str) -> int:
+    """Converts a varaukset.txt style text file to a snapshot. Returns the number of reservations."""
+    table = ReservationTable.from_reservations(get_reservations(reservationfile))
+    save_snapshot(table, snapshotfile)
+    return len(table)
+
+def main():
+    parser = argparse.ArgumentParser(description="Muuntaa varaustiedoston binääriseksi tilannekuvaksi.")
+    parser.add_argument("varaustiedosto", help="luettava varaustiedosto, esim. varaukset.txt")
+    parser.add_argument("tilannekuva", help="kirjoitettava tilannekuvatiedosto")
+    args = parser.parse_args()
+    rows = convert_to_snapshot(args.varaustiedosto, args.tilannekuva)
+    print(f"Tallennettiin {rows} varausta tiedostoon {args.tilannekuva}.")
+
+if __name__ == "__main__":
+    main()
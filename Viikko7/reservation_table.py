@@ -0,0 +1,130 @@
+# Copyright (c) 2025 Ville Heikkiniemi
+#
+# This code is licensed under the MIT License.
+# You are free to use, modify, and distribute this code,
+# provided that the original copyright notice is retained.
+#
+# See LICENSE file in the project root for full license information.
+
+from array import array
+from datetime import date, datetime, timedelta
+from itertools import compress
+import operator
+import sys
+from lue_varaukset import Reservation
+
+EPOCH = datetime(1970, 1, 1)
+LONG_RESERVATION_HOURS = 3
+# Byte value -> its 8 bits as 0/1 bytes, lowest bit first.
+BIT_EXPANSIONS = [bytes((byte >> bit) & 1 for bit in range(8)) for byte in range(256)]
+
+def to_epoch(moment: datetime) -> int:
+    """Converts a naive datetime to whole seconds since 1970-01-01."""
+    return (moment - EPOCH) // timedelta(seconds=1)
+
+def from_epoch(seconds: int) -> datetime:
+    """Converts seconds since 1970-01-01 back to a naive datetime."""
+    return EPOCH + timedelta(seconds=seconds)
+
+class ReservationTable:
+    """Reservations stored column by column.
+
+    Ids, durations, prices and the start and creation times (epoch seconds) are
+    typed arrays, the confirmation statuses are a bitset and rooms are stored as
+    codes into a list of interned room names. The per-reservation methods of
+    Reservation are available as column-wise operations over all rows.
+    """
+    def __init__(self):
+        self.ids = array("q")
+        self.names = []
+        self.emails = []
+        self.phones = []
+        self.starts = array("q")
+        self.durations = array("q")
+        self.prices = array("d")
+        self.confirmed_bits = bytearray()
+        self.room_codes = array("I")
+        self.rooms = []
+        self.room_index = {}
+        self.created = array("q")
+
+    @classmethod
+    def from_reservations(cls, reservations: list[Reservation]) -> "ReservationTable":
+        table = cls()
+        for reservation in reservations:
+            table.append(reservation)
+        return table
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    def room_code(self, room: str) -> int:
+        """Returns the code of the room, adding the room if it is new."""
+        code = self.room_index.get(room)
+        if code is None:
+            code = len(self.rooms)
+            room = sys.intern(room)
+            self.rooms.append(room)
+            self.room_index[room] = code
+        return code
+
+    def append(self, reservation: Reservation) -> None:
+        row = len(self.ids)
+        if row % 8 == 0:
+            self.confirmed_bits.append(0)
+        if reservation.reservation_confirmed:
+            self.confirmed_bits[row >> 3] |= 1 << (row & 7)
+        self.ids.append(reservation.reservation_id)
+        self.names.append(reservation.name)
+        self.emails.append(reservation.email)
+        self.phones.append(reservation.phone)
+        self.starts.append(to_epoch(datetime.combine(reservation.reservation_date, reservation.reservation_time)))
+        self.durations.append(reservation.reservation_duration)
+        self.prices.append(reservation.price)
+        self.room_codes.append(self.room_code(reservation.reserved_room))
+        self.created.append(to_epoch(reservation.reservation_created))
+
+    def is_confirmed(self, row: int) -> bool:
+        return bool(self.confirmed_bits[row >> 3] >> (row & 7) & 1)
+
+    def room(self, row: int) -> str:
+        return self.rooms[self.room_codes[row]]
+
+    def start(self, row: int) -> datetime:
+        return from_epoch(self.starts[row])
+
+    def reservation_date(self, row: int) -> date:
+        return self.start(row).date()
+
+    def row(self, row: int) -> Reservation:
+        """Returns the row as a Reservation object."""
+        start = self.start(row)
+        return Reservation(
+            reservation_id=self.ids[row],
+            name=self.names[row],
+            email=self.emails[row],
+            phone=self.phones[row],
+            reservation_date=start.date(),
+            reservation_time=start.time(),
+            reservation_duration=self.durations[row],
+            price=self.prices[row],
+            reservation_confirmed=self.is_confirmed(row),
+            reserved_room=self.room(row),
+            reservation_created=from_epoch(self.created[row])
+        )
+
+    def long_reservation(self) -> bytes:
+        """Returns a 0/1 mask of the rows lasting 3 hours or more."""
+        return bytes(map(LONG_RESERVATION_HOURS.__le__, self.durations))
+
+    def confirmed(self) -> bytes:
+        """Returns a 0/1 mask of the confirmed rows."""
+        return b"".join(map(BIT_EXPANSIONS.__getitem__, self.confirmed_bits))[:len(self)]
+
+    def total_price(self) -> array:
+        """Returns the total price (duration * price) of every row."""
+        return array("d", map(operator.mul, self.durations, self.prices))
+
+    def where(self, mask: bytes) -> list[int]:
+        """Returns the row numbers selected by a mask."""
+        return list(compress(range(len(self)), mask))
@@ -0,0 +1,96 @@
+# Copyright (c) 2025 Ville Heikkiniemi
+#
+# This code is licensed under the MIT License.
+# You are free to use, modify, and distribute this code,
+# provided that the original copyright notice is retained.
+#
+# See LICENSE file in the project root for full license information.
+
+from datetime import date, timedelta
+from lue_varaukset import Reservation
+
+EMPTY = (0, 0, 0.0)
+
+class RevenueCube:
+    """Reservation count, hours and revenue aggregated by (room, date, confirmed).
+
+    Besides the day cells, the cube keeps month totals per (room, year, month,
+    confirmed) and room totals per (room, confirmed), so month and room questions
+    are single lookups. Every level is updated when reservations are added,
+    removed or changed. The added reservations are kept by id, so only
+    reservations in the cube can be removed.
+    """
+    def __init__(self, reservations: list[Reservation] = ()):
+        self.reservations = {}
+        self.cells = {}
+        self.months = {}
+        self.rooms = {}
+        for reservation in reservations:
+            self.add(reservation)
+
+    def _apply(self, reservation: Reservation, sign: int) -> None:
+        room = reservation.reserved_room
+        day = reservation.reservation_date
+        confirmed = reservation.confirmed()
+        hours = reservation.reservation_duration
+        revenue = reservation.total_price()
+        for cells, key in ((self.cells, (room, day, confirmed)),
+                           (self.months, (room, day.year, day.month, confirmed)),
+                           (self.rooms, (room, confirmed))):
+            cell = cells.setdefault(key, [0, 0, 0.0])
+            cell[0] += sign
+            cell[1] += sign * hours
+            cell[2] += sign * revenue
+            if cell[0] == 0:
+                del cells[key]
+
+    def add(self, reservation: Reservation) -> None:
+        """Adds a reservation. Raises ValueError if its id is already in the cube."""
+        if reservation.reservation_id in self.reservations:
+            raise ValueError(f"Varaus {reservation.reservation_id} on jo olemassa.")
+        self.reservations[reservation.reservation_id] = reservation
+        self._apply(reservation, 1)
+
+    def remove(self, reservation: Reservation) -> None:
+        """Removes the figures the reservation was added with. Raises ValueError if it is not in the cube."""
+        added = self.reservations.pop(reservation.reservation_id, None)
+        if added is None:
+            raise ValueError(f"Varausta {reservation.reservation_id} ei ole lisätty.")
+        self._apply(added, -1)
+
+    def update(self, old: Reservation, new: Reservation) -> None:
+        """Replaces the figures of a reservation with those of its changed version."""
+        if new.reservation_id != old.reservation_id and new.reservation_id in self.reservations:
+            raise ValueError(f"Varaus {new.reservation_id} on jo olemassa.")
+        self.remove(old)
+        self.add(new)
+
+    @staticmethod
+    def _sum(cells: list) -> tuple[int, int, float]:
+        return (sum(cell[0] for cell in cells), sum(cell[1] for cell in cells), sum(cell[2] for cell in cells))
+
+    def _statuses(self, confirmed: bool | None) -> tuple[bool, ...]:
+        return (True, False) if confirmed is None else (confirmed,)
+
+    def _room_names(self, room: str | None) -> list[str]:
+        return sorted({key[0] for key in self.rooms}) if room is None else [room]
+
+    def day(self, room: str, day: date, confirmed: bool | None = None) -> tuple[int, int, float]:
+        """Returns (count, hours, revenue) of the room on the day."""
+        return self._sum([self.cells.get((room, day, status), EMPTY) for status in self._statuses(confirmed)])
+
+    def month(self, year: int, month: int, room: str | None = None, confirmed: bool | None = None) -> tuple[int, int, float]:
+        """Returns (count, hours, revenue) of the month for one room or all rooms."""
+        return self._sum([self.months.get((name, year, month, status), EMPTY)
+                          for name in self._room_names(room) for status in self._statuses(confirmed)])
+
+    def total(self, room: str | None = None, confirmed: bool | None = None) -> tuple[int, int, float]:
+        """Returns (count, hours, revenue) of one room or all rooms."""
+        return self._sum([self.rooms.get((name, status), EMPTY)
+                          for name in self._room_names(room) for status in self._statuses(confirmed)])
+
+    def between(self, start_date: date, end_date: date, room: str | None = None, confirmed: bool | None = None) -> tuple[int, int, float]:
+        """Returns (count, hours, revenue) from start_date to end_date (inclusive)."""
+        days = [start_date + timedelta(days=offset) for offset in range((end_date - start_date).days + 1)]
+        return self._sum([self.cells.get((name, day, status), EMPTY)
+                          for name in self._room_names(room) for day in days for status in self._statuses(confirmed)])
@@ -0,0 +1,124 @@
+# Copyright (c) 2025 Ville Heikkiniemi
+#
+# This code is licensed under the MIT License.
+# You are free to use, modify, and distribute this code,
+# provided that the original copyright notice is retained.
+#
+# See LICENSE file in the project root for full license information.
+
+from bisect import bisect_left, bisect_right
+from datetime import datetime, timedelta
+import heapq
+from itertools import count
+from lue_varaukset import Reservation
+
+def reservation_interval(reservation: Reservation) -> tuple[datetime, datetime]:
+    """Returns the start and end time of the reservation. The end may be on a later day."""
+    start = datetime.combine(reservation.reservation_date, reservation.reservation_time)
+    return start, start + timedelta(hours=reservation.reservation_duration)
+
+class ConflictError(ValueError):
+    """Raised when a reservation overlaps reservations already in the room."""
+    def __init__(self, reservation: Reservation, conflicts: list[Reservation]):
+        super().__init__(f"Varaus {reservation.reservation_id} menee päällekkäin varausten "
+                         f"{', '.join(str(conflict.reservation_id) for conflict in conflicts)} kanssa tilassa {reservation.reserved_room}.")
+        self.reservation = reservation
+        self.conflicts = conflicts
+
+class RoomSchedule:
+    """The reservations of one room as non-overlapping intervals sorted by start time.
+
+    Because the intervals do not overlap, their end times are sorted too, and the
+    reservations overlapping any period are found with two binary searches.
+    """
+    def __init__(self):
+        self.starts = []
+        self.ends = []
+        self.reservations = []
+
+    def _overlapping(self, start: datetime, end: datetime) -> tuple[int, int]:
+        """Returns the index range of the intervals overlapping start..end (end exclusive)."""
+        return bisect_right(self.ends, start), bisect_left(self.starts, end)
+
+    def conflicts(self, start: datetime, end: datetime) -> list[Reservation]:
+        first, stop = self._overlapping(start, end)
+        return self.reservations[first:stop]
+
+    def is_free(self, start: datetime, end: datetime) -> bool:
+        first, stop = self._overlapping(start, end)
+        return first >= stop
+
+    def add(self, reservation: Reservation) -> None:
+        """Adds the reservation. Raises ConflictError if it overlaps an earlier one."""
+        start, end = reservation_interval(reservation)
+        first, stop = self._overlapping(start, end)
+        if first < stop:
+            raise ConflictError(reservation, self.reservations[first:stop])
+        self.starts.insert(first, start)
+        self.ends.insert(first, end)
+        self.reservations.insert(first, reservation)
+
+    def remove(self, reservation: Reservation) -> None:
+        start, _ = reservation_interval(reservation)
+        index = bisect_left(self.starts, start)
+        if index == len(self.starts) or self.reservations[index] is not reservation:
+            raise ValueError(f"Varaus {reservation.reservation_id} ei ole tilassa {reservation.reserved_room}.")
+        del self.starts[index], self.ends[index], self.reservations[index]
+
+    def free_periods(self, start: datetime, end: datetime) -> list[tuple[datetime, datetime]]:
+        """Returns the free periods of the room between start and end."""
+        first, stop = self._overlapping(start, end)
+        periods = []
+        free_from = start
+        for index in range(first, stop):
+            if self.starts[index] > free_from:
+                periods.append((free_from, self.starts[index]))
+            free_from = max(free_from, self.ends[index])
+        if free_from < end:
+            periods.append((free_from, end))
+        return periods
+
+class RoomAvailability:
+    """Room schedules for availability queries and conflict detection on insert."""
+    def __init__(self, reservations: list[Reservation] = ()):
+        self.schedules = {}
+        for reservation in reservations:
+            self.add(reservation)
+
+    def schedule(self, room: str) -> RoomSchedule:
+        return self.schedules.get(room) or RoomSchedule()
+
+    def add(self, reservation: Reservation) -> None:
+        """Adds the reservation. Raises ConflictError if the room is already taken at that time."""
+        self.schedules.setdefault(reservation.reserved_room, RoomSchedule()).add(reservation)
+
+    def remove(self, reservation: Reservation) -> None:
+        self.schedule(reservation.reserved_room).remove(reservation)
+
+    def is_free(self, room: str, start: datetime, end: datetime) -> bool:
+        return self.schedule(room).is_free(start, end)
+
+    def conflicts(self, room: str, start: datetime, end: datetime) -> list[Reservation]:
+        return self.schedule(room).conflicts(start, end)
+
+    def free_periods(self, room: str, start: datetime, end: datetime) -> list[tuple[datetime, datetime]]:
+        return self.schedule(room).free_periods(start, end)
+
+def find_overlaps(reservations: list[Reservation]) -> list[tuple[Reservation, Reservation]]:
+    """Finds every pair of reservations of the same room that overlap in time.
+
+    The reservations are swept in start time order. A heap holds the reservations
+    still running in each room, and a new one overlaps all of them once those
+    that ended by its start have been removed.
+    """
+    intervals = sorted(((*reservation_interval(reservation), reservation) for reservation in reservations), key=lambda interval: interval[0])
+    running = {}
+    order = count()
+    overlaps = []
+    for start, end, reservation in intervals:
+        active = running.setdefault(reservation.reserved_room, [])
+        while active and active[0][0] <= start:
+            heapq.heappop(active)
+        overlaps.extend((other, reservation) for _, _, other in active)
+        heapq.heappush(active, (end, next(order), reservation))
+    return overlaps